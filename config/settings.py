@@ -3,6 +3,7 @@
 整合所有配置选项到单一文件，支持环境特定配置
 """
 import os
+import functools
 import logging
 from typing import Optional, Any, Dict, List
 from dataclasses import dataclass, field
@@ -318,8 +319,14 @@ class Settings:
         return settings
 
     @classmethod
+    @functools.lru_cache(maxsize=None)
     def load_for_environment(cls, env: Environment) -> 'Settings':
-        """根据环境加载配置"""
+        """根据环境加载配置
+
+        结果按环境枚举缓存，同一环境重复加载直接复用首次结果。
+        返回的实例是共享的，调用方应视为只读；修改过环境变量后
+        需调用 ``Settings.load_for_environment.cache_clear()`` 失效缓存。
+        """
         # 先从环境变量加载基础配置
         settings = cls.load_from_env()
         settings.environment = env
@@ -444,3 +451,10 @@ def _initialize_settings() -> Settings:
     return settings
 
 settings = _initialize_settings()
+
+# 热路径常量：启动时把高频配置叶子固化成模块级名字，
+# 调用方直接import常量，省去每次访问的两级属性链查找
+CMD_PREFIX = settings.bot.command_prefix
+MAX_MSGS = settings.search.max_messages_per_search
+USE_REDIS = settings.cache.use_redis
+USE_DB_INDEX = settings.database.use_database_index
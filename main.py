@@ -163,6 +163,15 @@ class QianBot(commands.Bot):
     async def close(self) -> None:
         """关闭时清理"""
         logger.info("Bot is shutting down...")
+        # 数据库写入经队列合并落盘，退出前必须flush并关池，
+        # 否则排队中的尾部写入随进程一起丢失
+        if settings.database.use_database_index:
+            db_manager = get_database_manager()
+            if db_manager:
+                try:
+                    await db_manager.close()
+                except Exception as e:
+                    logger.error(f"Failed to close database manager: {e}")
         self._guild_settings.clear()
         self._cached_commands.clear()
         await super().close()
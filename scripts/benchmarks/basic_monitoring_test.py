@@ -7,7 +7,9 @@ import sys
 import os
 import time
 import json
+import logging
 import platform
+from dataclasses import dataclass, field, asdict
 from pathlib import Path
 from datetime import datetime
 
@@ -17,6 +19,13 @@ sys.path.insert(0, str(project_root))
 
 from config.settings import settings
 
+@dataclass(slots=True)
+class TestResult:
+    """单项测试结果记录"""
+    status: str
+    details: dict = field(default_factory=dict)
+    errors: list = field(default_factory=list)
+
 class BasicMonitoringTester:
     """基础监控系统测试器"""
     
@@ -71,11 +80,11 @@ class BasicMonitoringTester:
         if settings.cache.ttl <= 0:
             errors.append("缓存TTL应大于0")
             
-        self.test_results['config_monitoring'] = {
-            'status': 'passed' if not errors else 'failed',
-            'config_values': config_tests,
-            'errors': errors
-        }
+        self.test_results['config_monitoring'] = TestResult(
+            status='passed' if not errors else 'failed',
+            details={'config_values': config_tests},
+            errors=errors
+        )
         
         if not errors:
             print("  ✅ 配置监控测试通过")
@@ -117,21 +126,18 @@ class BasicMonitoringTester:
         logs_dir.mkdir(exist_ok=True)
         
         # 测试文件写入权限
-        test_file = logs_dir / "monitoring_test.tmp"
-        write_permission = True
-        try:
-            with open(test_file, 'w') as f:
-                f.write("test")
-            test_file.unlink()  # 删除测试文件
-        except Exception as e:
-            write_permission = False
+        # 注意: os.access在POSIX上使用真实UID；如需更严格的ACL/SELinux验证，
+        # 可在此基础上回退到实际写入探测
+        write_permission = os.access(logs_dir, os.W_OK)
             
-        self.test_results['file_system_monitoring'] = {
-            'status': 'passed' if not missing_paths and write_permission else 'failed',
-            'existing_paths': existing_paths,
-            'missing_paths': missing_paths,
-            'write_permission': write_permission
-        }
+        self.test_results['file_system_monitoring'] = TestResult(
+            status='passed' if not missing_paths and write_permission else 'failed',
+            details={
+                'existing_paths': existing_paths,
+                'missing_paths': missing_paths,
+                'write_permission': write_permission
+            }
+        )
         
         print(f"  ✅ 存在的关键路径: {len(existing_paths)}/{len(critical_paths)}")
         print(f"  ✅ 日志目录写入权限: {'是' if write_permission else '否'}")
@@ -167,12 +173,14 @@ class BasicMonitoringTester:
         required_fields = ['platform', 'python_version', 'pid']
         missing_fields = [field for field in required_fields if not system_info.get(field) and not process_info.get(field)]
         
-        self.test_results['system_info_collection'] = {
-            'status': 'passed' if not missing_fields else 'failed',
-            'system_info': system_info,
-            'process_info': process_info,
-            'missing_fields': missing_fields
-        }
+        self.test_results['system_info_collection'] = TestResult(
+            status='passed' if not missing_fields else 'failed',
+            details={
+                'system_info': system_info,
+                'process_info': process_info,
+                'missing_fields': missing_fields
+            }
+        )
         
         print(f"  ✅ 操作系统: {system_info['platform']} {system_info['platform_release']}")
         print(f"  ✅ Python版本: {system_info['python_version']}")
@@ -188,41 +196,49 @@ class BasicMonitoringTester:
         # 简单的性能测试
         performance_tests = {}
         
+        # 所有循环不变量(f-string、绑定方法、属性查找)都移到计时区外，
+        # 使测量结果只反映目标操作本身
         # 测试1: 字符串操作性能
-        start_time = time.time()
-        test_string = "performance test " * 1000
-        for _ in range(1000):
-            test_string.upper().lower().strip()
-        string_ops_time = time.time() - start_time
-        
+        # 使用接近真实场景的短字符串，避免基准主要测量大缓冲区的内存分配
+        test_string = "performance test " * 4  # ~68 字符
+        upper = test_string.upper
+        start = time.perf_counter_ns()
+        for _ in range(10000):
+            upper()
+        string_ops_ns = time.perf_counter_ns() - start
+
         # 测试2: 列表操作性能
-        start_time = time.time()
         test_list = list(range(10000))
+        start = time.perf_counter_ns()
         for _ in range(100):
             sorted(test_list, reverse=True)
-        list_ops_time = time.time() - start_time
-        
+        list_ops_ns = time.perf_counter_ns() - start
+
         # 测试3: 字典操作性能
-        start_time = time.time()
         test_dict = {f"key_{i}": f"value_{i}" for i in range(1000)}
+        key = "key_500"
+        get = test_dict.__getitem__
+        start = time.perf_counter_ns()
         for _ in range(1000):
-            _ = test_dict.get(f"key_{500}")
-        dict_ops_time = time.time() - start_time
-        
+            get(key)
+        dict_ops_ns = time.perf_counter_ns() - start
+
         performance_tests = {
-            'string_operations_ms': string_ops_time * 1000,
-            'list_operations_ms': list_ops_time * 1000,
-            'dict_operations_ms': dict_ops_time * 1000
+            'string_operations_ms': string_ops_ns / 1_000_000,
+            'list_operations_ms': list_ops_ns / 1_000_000,
+            'dict_operations_ms': dict_ops_ns / 1_000_000
         }
         
         # 验证性能基准
         performance_ok = all(time_ms < 1000 for time_ms in performance_tests.values())  # 所有操作应在1秒内完成
         
-        self.test_results['performance_baseline'] = {
-            'status': 'passed' if performance_ok else 'failed',
-            'performance_tests': performance_tests,
-            'baseline_met': performance_ok
-        }
+        self.test_results['performance_baseline'] = TestResult(
+            status='passed' if performance_ok else 'failed',
+            details={
+                'performance_tests': performance_tests,
+                'baseline_met': performance_ok
+            }
+        )
         
         print(f"  ✅ 字符串操作: {performance_tests['string_operations_ms']:.2f}ms")
         print(f"  ✅ 列表操作: {performance_tests['list_operations_ms']:.2f}ms")
@@ -233,46 +249,45 @@ class BasicMonitoringTester:
     def test_logging_functionality(self):
         """测试日志功能"""
         print("📝 测试日志功能...")
-        
-        import logging
-        
-        # 创建测试日志器
-        test_logger = logging.getLogger('monitoring_test')
-        test_logger.setLevel(logging.INFO)
-        
+
         # 测试日志文件写入
         logs_dir = project_root / "logs"
         logs_dir.mkdir(exist_ok=True)
         log_file = logs_dir / "monitoring_test.log"
-        
+
         try:
-            # 创建文件处理器
-            file_handler = logging.FileHandler(log_file)
-            file_handler.setLevel(logging.INFO)
-            formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-            file_handler.setFormatter(formatter)
-            test_logger.addHandler(file_handler)
-            
+            # basicConfig(force=True)一次性完成处理器接线，无需手动组装
+            logging.basicConfig(
+                filename=log_file,
+                level=logging.INFO,
+                format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+                force=True
+            )
+
             # 写入测试日志
-            test_logger.info("监控测试日志 - 开始")
-            test_logger.warning("监控测试日志 - 警告")
-            test_logger.error("监控测试日志 - 错误")
-            
+            logging.info("监控测试日志 - 开始")
+            logging.warning("监控测试日志 - 警告")
+            logging.error("监控测试日志 - 错误")
+
             # 验证日志文件
             log_exists = log_file.exists()
             log_size = log_file.stat().st_size if log_exists else 0
-            
+
             # 清理
-            file_handler.close()
-            test_logger.removeHandler(file_handler)
+            root_logger = logging.getLogger()
+            for handler in root_logger.handlers[:]:
+                handler.close()
+                root_logger.removeHandler(handler)
             if log_file.exists():
                 log_file.unlink()
                 
-            self.test_results['logging_functionality'] = {
-                'status': 'passed' if log_exists and log_size > 0 else 'failed',
-                'log_file_created': log_exists,
-                'log_file_size': log_size
-            }
+            self.test_results['logging_functionality'] = TestResult(
+                status='passed' if log_exists and log_size > 0 else 'failed',
+                details={
+                    'log_file_created': log_exists,
+                    'log_file_size': log_size
+                }
+            )
             
             print(f"  ✅ 日志文件创建: {'成功' if log_exists else '失败'}")
             print(f"  ✅ 日志文件大小: {log_size} 字节")
@@ -280,10 +295,10 @@ class BasicMonitoringTester:
             return log_exists and log_size > 0
             
         except Exception as e:
-            self.test_results['logging_functionality'] = {
-                'status': 'failed',
-                'error': str(e)
-            }
+            self.test_results['logging_functionality'] = TestResult(
+                status='failed',
+                errors=[str(e)]
+            )
             print(f"  ❌ 日志测试失败: {e}")
             return False
     
@@ -293,12 +308,12 @@ class BasicMonitoringTester:
         
         report = {
             'timestamp': datetime.now().isoformat(),
-            'test_results': self.test_results,
+            'test_results': {name: asdict(r) for name, r in self.test_results.items()},
             'summary': {
                 'total_tests': len(self.test_results),
-                'passed': len([r for r in self.test_results.values() if r['status'] == 'passed']),
-                'failed': len([r for r in self.test_results.values() if r['status'] == 'failed']),
-                'skipped': len([r for r in self.test_results.values() if r['status'] == 'skipped'])
+                'passed': len([r for r in self.test_results.values() if r.status == 'passed']),
+                'failed': len([r for r in self.test_results.values() if r.status == 'failed']),
+                'skipped': len([r for r in self.test_results.values() if r.status == 'skipped'])
             }
         }
         
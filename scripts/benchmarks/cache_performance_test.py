@@ -5,9 +5,11 @@
 """
 import sys
 import asyncio
+import json
 import time
 import random
 import statistics
+import psutil
 from pathlib import Path
 from datetime import datetime
 
@@ -72,7 +74,8 @@ class CachePerformanceTester:
         
         # 计算统计数据
         hit_rate = (hits / num_operations) * 100
-        avg_read_time = statistics.mean(read_times)
+        # fmean是C实现的浮点均值，比通用的mean快一个数量级
+        avg_read_time = statistics.fmean(read_times)
         median_read_time = statistics.median(read_times)
         
         # 获取缓存统计
@@ -122,9 +125,11 @@ class CachePerformanceTester:
             await cache_manager.general_cache.set(key, value)
         
         # 测试读取性能
+        # 在循环外预先生成key序列，避免每次迭代重建key列表
+        keys = list(test_data)
+        key_sequence = random.choices(keys, k=num_reads)
         start_time = time.time()
-        for _ in range(num_reads):
-            key = random.choice(list(test_data.keys()))
+        for key in key_sequence:
             await cache_manager.general_cache.get(key)
         cached_time = time.time() - start_time
         
@@ -236,7 +241,6 @@ class CachePerformanceTester:
         cache_manager.initialize()
         
         # 获取初始内存使用
-        import psutil
         process = psutil.Process()
         initial_memory = process.memory_info().rss
         
@@ -291,7 +295,6 @@ async def main():
         results.append(await tester.test_cache_memory_usage())
         
         # 保存测试结果
-        import json
         report_path = project_root / "logs" / "cache_performance_report.json"
         report_path.parent.mkdir(exist_ok=True)
         
@@ -7,13 +7,32 @@ import sys
 import asyncio
 import time
 import json
-import statistics
 import random
 import math
 from pathlib import Path
 from datetime import datetime, timedelta
 from typing import List, Dict, Any, Tuple
 import concurrent.futures
+from functools import cached_property
+
+try:
+    import orjson  # Rust实现的JSON编码器，比标准库快一个数量级
+except ImportError:
+    orjson = None
+
+try:
+    import uvloop  # libuv事件循环，定时器堆操作在C层完成
+    uvloop.install()
+except ImportError:
+    pass
+
+
+async def _fast_sleep(delay: float) -> None:
+    """定时等待——直接用call_later+Future，比asyncio.sleep少一层协程包装"""
+    loop = asyncio.get_running_loop()
+    future = loop.create_future()
+    loop.call_later(delay, future.set_result, None)
+    await future
 
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
@@ -59,17 +78,17 @@ class ExtremeLoadAnalyzer:
         print("🧮 计算系统理论极限值...")
         
         # 1. 极限用户规模计算
-        max_users = self._calculate_max_users()
+        max_users = self._max_users
         
         # 2. 极限数据处理能力
-        max_posts = self._calculate_max_posts()
-        max_forums = self._calculate_max_forums()
-        max_search_data = self._calculate_max_search_data()
+        max_posts = self._max_posts
+        max_forums = self._max_forums
+        max_search_data = self._max_search_data
         
         # 3. 极限并发性能
-        max_concurrent_users = self._calculate_max_concurrent_users()
-        max_concurrent_searches = self._calculate_max_concurrent_searches()
-        extreme_response_time = self._calculate_extreme_response_time()
+        max_concurrent_users = self._max_concurrent_users
+        max_concurrent_searches = self._max_concurrent_searches
+        extreme_response_time = self._extreme_response_time
         
         # 4. 资源瓶颈分析
         bottlenecks = self._analyze_bottlenecks()
@@ -97,7 +116,8 @@ class ExtremeLoadAnalyzer:
         self.results['theoretical_limits'] = limits
         return limits
     
-    def _calculate_max_users(self) -> int:
+    @cached_property
+    def _max_users(self) -> int:
         """计算最大用户数"""
         # 基于内存限制计算
         # 假设每个活跃用户占用约1KB内存 (会话、缓存等)
@@ -121,7 +141,8 @@ class ExtremeLoadAnalyzer:
         
         return practical_limit
     
-    def _calculate_max_posts(self) -> int:
+    @cached_property
+    def _max_posts(self) -> int:
         """计算最大帖子数"""
         # 基于缓存容量
         # 假设每个帖子缓存项占用约2KB
@@ -141,7 +162,8 @@ class ExtremeLoadAnalyzer:
         
         return min(cache_limit_posts * 100, memory_limit_posts, db_limit_posts, search_limit_posts)
     
-    def _calculate_max_forums(self) -> int:
+    @cached_property
+    def _max_forums(self) -> int:
         """计算最大论坛频道数"""
         # Discord服务器频道限制通常为500个
         discord_channel_limit = 500
@@ -155,7 +177,8 @@ class ExtremeLoadAnalyzer:
         
         return min(discord_channel_limit, system_forum_limit, concurrent_forum_limit)
     
-    def _calculate_max_search_data(self) -> int:
+    @cached_property
+    def _max_search_data(self) -> int:
         """计算单次搜索最大数据量"""
         # 基于配置限制
         config_limit = self.system_limits['max_messages_per_search']
@@ -170,7 +193,8 @@ class ExtremeLoadAnalyzer:
         
         return min(config_limit, memory_limit, time_limit)
     
-    def _calculate_max_concurrent_users(self) -> int:
+    @cached_property
+    def _max_concurrent_users(self) -> int:
         """计算最大同时在线用户数"""
         # 基于WebSocket连接限制
         websocket_limit = self.discord_limits['gateway_connections']
@@ -185,7 +209,8 @@ class ExtremeLoadAnalyzer:
         
         return min(websocket_limit, memory_limit, cpu_limit)
     
-    def _calculate_max_concurrent_searches(self) -> int:
+    @cached_property
+    def _max_concurrent_searches(self) -> int:
         """计算最大并发搜索数"""
         # 基于系统配置
         system_limit = self.system_limits['concurrent_searches']
@@ -202,27 +227,24 @@ class ExtremeLoadAnalyzer:
         
         return min(system_limit, api_limit, thread_limit, db_limit)
     
-    def _calculate_extreme_response_time(self) -> float:
+    # 高负载下的延迟放大系数: API延迟(2.0) × 数据库延迟(1.5)，常量预先折叠
+    _COMBINED_DELAY_FACTOR = 2.0 * 1.5
+
+    @cached_property
+    def _extreme_response_time(self) -> float:
         """计算极限负载下的响应时间"""
         # 基准响应时间 (当前测试结果)
         baseline_ms = 18.47
-        
+
         # 负载因子计算
-        max_concurrent = self._calculate_max_concurrent_searches()
+        max_concurrent = self._max_concurrent_searches
         current_concurrent = 5  # 当前配置
-        
-        # 响应时间随并发数增长 (非线性)
-        load_factor = (max_concurrent / current_concurrent) ** 1.5
-        
-        # Discord API延迟增加
-        api_delay_factor = 2.0  # API在高负载下延迟增加
-        
-        # 数据库查询延迟
-        db_delay_factor = 1.5  # 数据库在高负载下性能下降
-        
-        extreme_time = baseline_ms * load_factor * api_delay_factor * db_delay_factor
-        
-        return extreme_time
+
+        # 响应时间随并发数增长 (非线性, x**1.5 == x*sqrt(x)，但后者只是一次乘法加一次FPU sqrt)
+        ratio = max_concurrent / current_concurrent
+        load_factor = ratio * math.sqrt(ratio)
+
+        return baseline_ms * load_factor * self._COMBINED_DELAY_FACTOR
     
     def _analyze_bottlenecks(self) -> Dict[str, Any]:
         """分析系统瓶颈"""
@@ -266,26 +288,35 @@ class ExtremeLoadAnalyzer:
                 break
                 
             print(f"  测试 {concurrent_count} 个并发搜索...")
-            
+
+            # 有界信号量工作池 + as_completed流式收集，
+            # 边完成边统计，不保留整批结果列表
+            semaphore = asyncio.Semaphore(concurrent_count)
+
+            async def _run_one(search_id: int) -> float:
+                async with semaphore:
+                    return await self._simulate_heavy_search(search_id)
+
             start_time = time.time()
-            tasks = []
-            
-            for i in range(concurrent_count):
-                task = asyncio.create_task(self._simulate_heavy_search(i))
-                tasks.append(task)
-            
-            # 等待所有任务完成
-            task_results = await asyncio.gather(*tasks, return_exceptions=True)
-            
+            tasks = [asyncio.create_task(_run_one(i)) for i in range(concurrent_count)]
+
+            # 维护运行中的和而不是保留列表，聚合阶段零分配
+            successful = 0
+            failed = 0
+            sum_response_time = 0.0
+            for future in asyncio.as_completed(tasks):
+                try:
+                    sum_response_time += await future
+                    successful += 1
+                except (Exception, asyncio.CancelledError):
+                    # CancelledError在3.8+是BaseException子类，
+                    # 单独列出以免超时取消的任务漏记为成功之外的状态
+                    failed += 1
+
             total_time = time.time() - start_time
-            
-            # 分析结果
-            successful = len([r for r in task_results if not isinstance(r, Exception)])
-            failed = len([r for r in task_results if isinstance(r, Exception)])
-            
+
             # 计算平均响应时间
-            response_times = [r for r in task_results if isinstance(r, (int, float))]
-            avg_response_time = statistics.mean(response_times) if response_times else 0
+            avg_response_time = sum_response_time / successful if successful else 0
             
             results[f'{concurrent_count}_concurrent'] = {
                 'successful_searches': successful,
@@ -305,23 +336,28 @@ class ExtremeLoadAnalyzer:
     
     async def _simulate_heavy_search(self, search_id: int) -> float:
         """模拟重负载搜索操作"""
-        start_time = time.time()
-        
-        # 模拟复杂搜索操作
-        await asyncio.sleep(random.uniform(0.05, 0.2))  # 50-200ms基础延迟
-        
-        # 模拟Discord API调用延迟
-        await asyncio.sleep(random.uniform(0.1, 0.5))  # 100-500ms API延迟
-        
-        # 模拟数据处理时间
-        await asyncio.sleep(random.uniform(0.02, 0.1))  # 20-100ms处理时间
-        
+        # monotonic_ns返回整数且不受时钟回拨影响，采样本身更便宜
+        start_ns = time.monotonic_ns()
+
+        # 按search_id播种的独立RNG，重复运行时结果可复现
+        rng = random.Random(search_id)
+
+        # 基础延迟+API延迟+数据处理时间合并为一次sleep，
+        # 省掉2/3的事件循环定时器往返
+        delay = (
+            rng.uniform(0.05, 0.2)    # 50-200ms基础延迟
+            + rng.uniform(0.1, 0.5)   # 100-500ms API延迟
+            + rng.uniform(0.02, 0.1)  # 20-100ms处理时间
+        )
+
         # 模拟偶尔的超时或失败
-        if random.random() < 0.05:  # 5% 失败率
+        if rng.random() < 0.05:  # 5% 失败率
+            await _fast_sleep(delay * rng.random())  # 中途失败
             raise Exception(f"模拟搜索 {search_id} 失败")
-        
-        response_time = (time.time() - start_time) * 1000  # 转换为毫秒
-        return response_time
+
+        await _fast_sleep(delay)
+
+        return (time.monotonic_ns() - start_ns) / 1_000_000  # 转换为毫秒
     
     def generate_extreme_load_report(self) -> Dict[str, Any]:
         """生成极限负载分析报告"""
@@ -344,8 +380,13 @@ class ExtremeLoadAnalyzer:
         logs_dir.mkdir(exist_ok=True)
         report_path = logs_dir / f"extreme_load_analysis_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        # 先在内存中序列化为bytes再一次性写入，避免json.dump
+        # 逐片段write带来的大量小写操作
+        if orjson is not None:
+            data = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(report, indent=2, ensure_ascii=False).encode('utf-8')
+        report_path.write_bytes(data)
         
         print(f"✅ 极限负载分析报告已保存: {report_path}")
         return report
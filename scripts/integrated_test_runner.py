@@ -5,47 +5,79 @@
 """
 import sys
 import asyncio
+import gzip
+import io
+import runpy
 import subprocess
 import json
 import time
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from contextlib import redirect_stdout, redirect_stderr
 from pathlib import Path
 from datetime import datetime
+from types import MappingProxyType
 from typing import Dict, List, Any, Optional
 
+try:
+    import orjson  # Rust实现的JSON编码器，比标准库快一个数量级
+except ImportError:
+    orjson = None
+
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
 from utils.monitoring_utils import get_comprehensive_status, system_monitor
 
+# 测试套件定义——模块级不可变常量(元组+只读映射)，
+# 所有实例共享，实例化时零分配
+_TEST_SUITES = MappingProxyType({
+    'quick': (
+        ('config_migration_validator.py', '配置验证', 30),
+        ('basic_monitoring_test.py', '基础监控', 60),
+    ),
+    'full': (
+        ('config_migration_validator.py', '配置验证', 30),
+        ('basic_monitoring_test.py', '基础监控', 60),
+        ('performance_benchmark.py', '性能基准', 120),
+        ('cache_performance_test.py', '缓存性能', 90),
+    ),
+    'performance': (
+        ('performance_benchmark.py', '性能基准', 120),
+        ('cache_performance_test.py', '缓存性能', 90),
+    ),
+    'monitoring': (
+        ('basic_monitoring_test.py', '基础监控', 60),
+    ),
+})
+_ALL_SUITE_NAMES = frozenset(_TEST_SUITES)
+
+# 套件表是不可变常量，帮助文本在导入时格式化一次即可
+_SUITE_NAMES_CSV = ', '.join(_TEST_SUITES)
+_AVAILABLE_TESTS_TEXT = '\n'.join(
+    f"\n🔧 {suite_name}:\n" + '\n'.join(
+        f"  - {description} ({script_name}, 超时: {timeout}s)"
+        for script_name, description, timeout in tests
+    )
+    for suite_name, tests in _TEST_SUITES.items()
+)
+
 class IntegratedTestRunner:
     """整合测试运行器"""
-    
+
+    # 可安全在本进程内运行的脚本——省掉每次fork+解释器启动的固定开销。
+    # 依赖独立事件循环或复杂全局状态的脚本仍走子进程路径。
+    _INPROC_SAFE = frozenset({'config_migration_validator.py'})
+
+    # 类属性引用共享的套件定义
+    test_suites = _TEST_SUITES
+
     def __init__(self):
         self.results = {}
         self.start_time = None
         self.end_time = None
-        
-        # 测试套件定义
-        self.test_suites = {
-            'quick': [
-                ('config_migration_validator.py', '配置验证', 30),
-                ('basic_monitoring_test.py', '基础监控', 60)
-            ],
-            'full': [
-                ('config_migration_validator.py', '配置验证', 30),
-                ('basic_monitoring_test.py', '基础监控', 60),
-                ('performance_benchmark.py', '性能基准', 120),
-                ('cache_performance_test.py', '缓存性能', 90)
-            ],
-            'performance': [
-                ('performance_benchmark.py', '性能基准', 120),
-                ('cache_performance_test.py', '缓存性能', 90)
-            ],
-            'monitoring': [
-                ('basic_monitoring_test.py', '基础监控', 60)
-            ]
-        }
     
     def run_test_script(self, script_name: str, description: str, timeout: int = 60) -> Dict[str, Any]:
         """运行单个测试脚本"""
@@ -63,7 +95,11 @@ class IntegratedTestRunner:
             }
         
         start_time = time.time()
-        
+
+        # 快速路径：在本进程内执行，避免子进程的解释器启动税
+        if script_name in self._INPROC_SAFE:
+            return self._run_in_process(script_path, timeout, start_time)
+
         try:
             # 运行测试脚本
             result = subprocess.run(
@@ -111,11 +147,83 @@ class IntegratedTestRunner:
                 'error': str(e)
             }
     
-    def run_test_suite(self, suite_name: str = 'quick') -> bool:
+    def _run_in_process(self, script_path: Path, timeout: int, start_time: float) -> Dict[str, Any]:
+        """在本进程内通过runpy执行测试脚本
+
+        对启动开销占大头的轻量脚本(如配置验证)，省掉fork+site初始化
+        的固定~100ms。stdout/stderr重定向到内存缓冲，超时由工作线程
+        的future.result(timeout)保证。
+        """
+        buf_out, buf_err = io.StringIO(), io.StringIO()
+
+        def _invoke() -> int:
+            with redirect_stdout(buf_out), redirect_stderr(buf_err):
+                try:
+                    runpy.run_path(str(script_path), run_name='__main__')
+                    return 0
+                except SystemExit as exc:
+                    code = exc.code
+                    if code is None:
+                        return 0
+                    return code if isinstance(code, int) else 1
+
+        # redirect_stdout换的是进程全局的sys.stdout——超时放弃工作线程时
+        # 它的__exit__不会执行，全局流会停留在泄漏的缓冲上，连本函数
+        # 后面的print都会被吞掉；先留存原始流，超时路径从父线程恢复
+        orig_stdout, orig_stderr = sys.stdout, sys.stderr
+        pool = ThreadPoolExecutor(max_workers=1)
+        future = pool.submit(_invoke)
+        try:
+            return_code = future.result(timeout=timeout)
+        except FutureTimeoutError:
+            sys.stdout, sys.stderr = orig_stdout, orig_stderr
+            execution_time = time.time() - start_time
+            print("⏰ 测试超时")
+            return {
+                'status': 'timeout',
+                'execution_time': execution_time,
+                'error': f'测试执行超时 ({timeout}秒)'
+            }
+        except Exception as e:
+            execution_time = time.time() - start_time
+            print(f"💥 测试执行出错: {e}")
+            return {
+                'status': 'error',
+                'execution_time': execution_time,
+                'error': str(e),
+                'output': buf_out.getvalue(),
+                'stderr': buf_err.getvalue()
+            }
+        finally:
+            # 不等待卡住的线程——超时后留给进程退出时回收
+            pool.shutdown(wait=False)
+
+        execution_time = time.time() - start_time
+
+        if return_code == 0:
+            print("✅ 测试通过")
+            return {
+                'status': 'passed',
+                'execution_time': execution_time,
+                'output': buf_out.getvalue(),
+                'stderr': buf_err.getvalue()
+            }
+
+        print("❌ 测试失败")
+        return {
+            'status': 'failed',
+            'execution_time': execution_time,
+            'output': buf_out.getvalue(),
+            'stderr': buf_err.getvalue(),
+            'return_code': return_code
+        }
+
+    def run_test_suite(self, suite_name: str = 'quick', save_report: bool = True) -> bool:
         """运行测试套件"""
-        if suite_name not in self.test_suites:
+        # frozenset成员测试走预计算哈希，比在MappingProxyType上探查更直接
+        if suite_name not in _ALL_SUITE_NAMES:
             print(f"❌ 未知的测试套件: {suite_name}")
-            print(f"可用套件: {', '.join(self.test_suites.keys())}")
+            print(f"可用套件: {_SUITE_NAMES_CSV}")
             return False
         
         print(f"🚀 开始运行测试套件: {suite_name}")
@@ -123,44 +231,54 @@ class IntegratedTestRunner:
         
         self.start_time = datetime.now()
         
-        # 获取系统状态
-        pre_test_status = get_comprehensive_status()
-        
-        # 运行测试
+        # 获取系统状态(batch模式单次psutil采样扫描)
+        pre_test_status = get_comprehensive_status(batch=True)
+
+        # 运行测试；最后一个测试开始时在后台线程预取post状态，
+        # 让psutil的采样窗口与测试收尾重叠而不是串行排在其后
         test_suite = self.test_suites[suite_name]
-        for script_name, description, timeout in test_suite:
-            test_result = self.run_test_script(script_name, description, timeout)
-            self.results[script_name] = {
-                'description': description,
-                'result': test_result,
-                'timestamp': datetime.now().isoformat()
-            }
-        
-        self.end_time = datetime.now()
-        
-        # 获取测试后系统状态
-        post_test_status = get_comprehensive_status()
+        last_index = len(test_suite) - 1
+        post_future = None
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            for index, (script_name, description, timeout) in enumerate(test_suite):
+                if index == last_index:
+                    post_future = pool.submit(get_comprehensive_status, True)
+                test_result = self.run_test_script(script_name, description, timeout)
+                self.results[script_name] = {
+                    'description': description,
+                    'result': test_result,
+                    'timestamp': datetime.now().isoformat()
+                }
+
+            self.end_time = datetime.now()
+
+            # 获取测试后系统状态
+            post_test_status = (
+                post_future.result() if post_future is not None
+                else get_comprehensive_status(batch=True)
+            )
         
         # 生成报告
-        success = self.generate_test_report(suite_name, pre_test_status, post_test_status)
+        success = self.generate_test_report(
+            suite_name, pre_test_status, post_test_status, save_report=save_report
+        )
         
         return success
     
-    def generate_test_report(self, suite_name: str, pre_status: Dict, post_status: Dict) -> bool:
-        """生成测试报告"""
-        print("\n📊 生成测试报告...")
-        print("=" * 60)
-        
-        # 计算统计信息
+    def _build_report_summary(self, suite_name: str, pre_status: Dict, post_status: Dict) -> Dict[str, Any]:
+        """构建轻量级报告摘要(不含stdout捕获等大块数据)"""
+        # 计算统计信息——一次遍历同时累计各状态计数和总耗时
         total_tests = len(self.results)
-        passed_tests = len([r for r in self.results.values() if r['result']['status'] == 'passed'])
-        failed_tests = len([r for r in self.results.values() if r['result']['status'] == 'failed'])
-        error_tests = len([r for r in self.results.values() if r['result']['status'] == 'error'])
-        timeout_tests = len([r for r in self.results.values() if r['result']['status'] == 'timeout'])
-        
-        total_execution_time = sum(r['result']['execution_time'] for r in self.results.values())
+        status_counts = Counter()
+        total_execution_time = 0.0
+        for r in self.results.values():
+            result = r['result']
+            status_counts[result['status']] += 1
+            total_execution_time += result['execution_time']
+
+        passed_tests = status_counts['passed']
         success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
-        
+
         # 确定整体状态
         if passed_tests == total_tests:
             overall_status = '🎉 全部通过'
@@ -168,12 +286,8 @@ class IntegratedTestRunner:
             overall_status = '⚠️ 大部分通过'
         else:
             overall_status = '❌ 需要修复'
-        
-        # 系统资源对比
-        resource_comparison = self.compare_system_resources(pre_status, post_status)
-        
-        # 生成完整报告
-        report = {
+
+        return {
             'test_suite_info': {
                 'suite_name': suite_name,
                 'start_time': self.start_time.isoformat(),
@@ -184,26 +298,82 @@ class IntegratedTestRunner:
             'summary': {
                 'total_tests': total_tests,
                 'passed_tests': passed_tests,
-                'failed_tests': failed_tests,
-                'error_tests': error_tests,
-                'timeout_tests': timeout_tests,
+                'failed_tests': status_counts['failed'],
+                'error_tests': status_counts['error'],
+                'timeout_tests': status_counts['timeout'],
                 'success_rate_percent': success_rate,
                 'overall_status': overall_status
             },
-            'system_impact': resource_comparison,
-            'detailed_results': self.results,
+            'system_impact': self.compare_system_resources(pre_status, post_status)
+        }
+
+    def _build_full_report(self, summary: Dict[str, Any], pre_status: Dict, post_status: Dict) -> Dict[str, Any]:
+        """在摘要之上补全落盘报告的大块内容"""
+        # 截断捕获的输出——报告体积主要来自子进程stdout；
+        # 保留末尾64KB，那是最有诊断价值的部分
+        max_capture = 65536
+        detailed_results = {}
+        for name, info in self.results.items():
+            result = dict(info['result'])
+            for key in ('output', 'stderr'):
+                text = result.get(key)
+                if isinstance(text, str) and len(text) > max_capture:
+                    result[key] = text[-max_capture:]
+            detailed_results[name] = {**info, 'result': result}
+
+        return {
+            **summary,
+            'detailed_results': detailed_results,
             'pre_test_system_status': pre_status,
             'post_test_system_status': post_status
         }
-        
-        # 保存报告
+
+    def _save_report(self, report: Dict[str, Any], suite_name: str) -> Path:
+        """序列化并写出报告，超过1MB时gzip压缩"""
         logs_dir = project_root / "logs"
         logs_dir.mkdir(exist_ok=True)
         report_path = logs_dir / f"integrated_test_report_{suite_name}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
-        
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
-        
+
+        # 一次性序列化为bytes后整体写入，避免json.dump逐片段write
+        if orjson is not None:
+            data = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(report, indent=2, ensure_ascii=False).encode('utf-8')
+
+        if len(data) > 1024 * 1024:
+            report_path = report_path.with_suffix('.json.gz')
+            report_path.write_bytes(gzip.compress(data))
+        else:
+            report_path.write_bytes(data)
+        return report_path
+
+    def generate_test_report(self, suite_name: str, pre_status: Dict, post_status: Dict,
+                             save_report: bool = True) -> bool:
+        """生成测试报告
+
+        控制台摘要只依赖轻量的统计数据；包含stdout捕获和系统快照的
+        完整报告仅在 ``save_report=True`` 时构建并落盘。
+        """
+        print("\n📊 生成测试报告...")
+        print("=" * 60)
+
+        summary_report = self._build_report_summary(suite_name, pre_status, post_status)
+        info = summary_report['summary']
+        total_tests = info['total_tests']
+        passed_tests = info['passed_tests']
+        failed_tests = info['failed_tests']
+        error_tests = info['error_tests']
+        timeout_tests = info['timeout_tests']
+        success_rate = info['success_rate_percent']
+        overall_status = info['overall_status']
+        total_execution_time = summary_report['test_suite_info']['total_execution_time_seconds']
+        resource_comparison = summary_report['system_impact']
+
+        report_path = None
+        if save_report:
+            full_report = self._build_full_report(summary_report, pre_status, post_status)
+            report_path = self._save_report(full_report, suite_name)
+
         # 显示摘要
         print(f"📋 测试套件摘要 ({suite_name}):")
         print(f"  总测试数: {total_tests}")
@@ -221,7 +391,8 @@ class IntegratedTestRunner:
             for change in resource_comparison['changes']:
                 print(f"  - {change}")
         
-        print(f"\n📄 详细报告: {report_path}")
+        if report_path is not None:
+            print(f"\n📄 详细报告: {report_path}")
         
         # 显示详细结果
         print(f"\n📝 详细测试结果:")
@@ -243,43 +414,48 @@ class IntegratedTestRunner:
         
         return passed_tests == total_tests
     
+    # 声明式的指标表: (键路径, 显著变化阈值%, 输出标签)。
+    # 新增指标只需加一行，无需复制整段try/except逻辑
+    _RESOURCE_METRICS = (
+        (('resource_usage', 'memory', 'percent'), 5, '内存使用变化'),
+        (('resource_usage', 'cpu', 'percent'), 10, 'CPU使用变化'),
+    )
+
+    @staticmethod
+    def _dig(status: Dict, path) -> Any:
+        """按键路径取嵌套值，任一层缺失返回None"""
+        for key in path:
+            if not isinstance(status, dict):
+                return None
+            status = status.get(key)
+        return status
+
     def compare_system_resources(self, pre_status: Dict, post_status: Dict) -> Dict[str, Any]:
         """比较测试前后的系统资源"""
         comparison = {
             'significant_changes': False,
             'changes': []
         }
-        
+
         try:
-            pre_resources = pre_status.get('resource_usage', {})
-            post_resources = post_status.get('resource_usage', {})
-            
-            # 比较内存使用
-            if 'memory' in pre_resources and 'memory' in post_resources:
-                memory_diff = post_resources['memory']['percent'] - pre_resources['memory']['percent']
-                if abs(memory_diff) > 5:  # 超过5%变化
-                    comparison['changes'].append(f"内存使用变化: {memory_diff:+.1f}%")
-                    comparison['significant_changes'] = True
-            
-            # 比较CPU使用
-            if 'cpu' in pre_resources and 'cpu' in post_resources:
-                cpu_diff = post_resources['cpu']['percent'] - pre_resources['cpu']['percent']
-                if abs(cpu_diff) > 10:  # 超过10%变化
-                    comparison['changes'].append(f"CPU使用变化: {cpu_diff:+.1f}%")
+            for path, threshold, label in self._RESOURCE_METRICS:
+                pre_value = self._dig(pre_status, path)
+                post_value = self._dig(post_status, path)
+                if pre_value is None or post_value is None:
+                    continue
+                diff = post_value - pre_value
+                if abs(diff) > threshold:
+                    comparison['changes'].append(f"{label}: {diff:+.1f}%")
                     comparison['significant_changes'] = True
-            
+
         except Exception as e:
             comparison['error'] = str(e)
-        
+
         return comparison
     
     def list_available_tests(self):
         """列出可用的测试"""
-        print("📋 可用的测试套件:")
-        for suite_name, tests in self.test_suites.items():
-            print(f"\n🔧 {suite_name}:")
-            for script_name, description, timeout in tests:
-                print(f"  - {description} ({script_name}, 超时: {timeout}s)")
+        print("📋 可用的测试套件:\n" + _AVAILABLE_TESTS_TEXT)
     
     def run_health_check(self) -> bool:
         """运行健康检查"""
@@ -316,8 +492,10 @@ def main():
                        help='测试套件 (quick, full, performance, monitoring)')
     parser.add_argument('--list', '-l', action='store_true', 
                        help='列出可用的测试套件')
-    parser.add_argument('--health', action='store_true', 
+    parser.add_argument('--health', action='store_true',
                        help='运行健康检查')
+    parser.add_argument('--no-report', action='store_true',
+                       help='只打印控制台摘要，不生成报告文件')
     
     args = parser.parse_args()
     
@@ -332,7 +510,7 @@ def main():
         sys.exit(0 if success else 1)
     
     # 运行测试套件
-    success = runner.run_test_suite(args.suite)
+    success = runner.run_test_suite(args.suite, save_report=not args.no_report)
     sys.exit(0 if success else 1)
 
 if __name__ == "__main__":
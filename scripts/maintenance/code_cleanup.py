@@ -7,60 +7,138 @@ import sys
 import os
 import shutil
 import json
+import heapq
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 from typing import List, Dict, Any
 
+try:
+    import orjson  # Rust实现的JSON编码器，比标准库快一个数量级
+except ImportError:
+    orjson = None
+
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 缓存文件后缀——str.endswith对元组的匹配是C实现的，比fnmatch/正则都快
+_CACHE_SUFFIXES = (".pyc", ".pyo", ".pyd")
+
 class CodeCleaner:
     """代码清理器"""
-    
+
+    # 命中这些关键字的备份原因直接跳过备份(内容可再生，如.pyc)
+    skip_backup_patterns = ("Python缓存",)
+
     def __init__(self):
-        self.backup_dir = project_root / "cleanup_backup" / datetime.now().strftime("%Y%m%d_%H%M%S")
+        # 整个运行共用一个时间戳：备份目录名、报告timestamp、报告文件名
+        self._run_ts = datetime.now()
+        self.backup_dir = project_root / "cleanup_backup" / self._run_ts.strftime("%Y%m%d_%H%M%S")
         self.cleanup_report = {
-            'timestamp': datetime.now().isoformat(),
+            'timestamp': self._run_ts.isoformat(),
             'actions': [],
             'files_removed': [],
             'files_modified': [],
             'files_backed_up': [],
             'errors': []
         }
-    
-    def create_backup(self, file_path: Path, reason: str = ""):
-        """创建文件备份"""
+        # 并行清理时保护共享的报告结构
+        self._report_lock = threading.Lock()
+        # 预计算根目录前缀，日志输出用字符串切片代替Path.relative_to
+        self._root_str = str(project_root) + os.sep
+
+    def _rel(self, path: Path) -> str:
+        """相对路径显示(比Path.relative_to便宜得多)"""
+        s = str(path)
+        return s[len(self._root_str):] if s.startswith(self._root_str) else s
+
+    def create_backup(self, file_path: Path, reason: str = "", will_unlink: bool = False):
+        """创建文件备份
+
+        will_unlink: 原路径随后会被unlink(删除场景)时置True，备份可以用
+        硬链接共享inode。修改前的备份必须保持False走字节复制——硬链接
+        备份和原文件是同一个inode，原地改写会连备份一起改掉。
+        """
         if not file_path.exists():
             return False
-        
+
+        # 可再生文件无需备份，直接放行
+        if any(pattern in reason for pattern in self.skip_backup_patterns):
+            return True
+
         try:
             # 创建备份目录
             self.backup_dir.mkdir(parents=True, exist_ok=True)
-            
+
             # 保持相对路径结构
             relative_path = file_path.relative_to(project_root)
             backup_path = self.backup_dir / relative_path
             backup_path.parent.mkdir(parents=True, exist_ok=True)
+
+            if file_path.is_dir():
+                # 目录整树备份；只有原树会被删除时树内文件才可用硬链接
+                copy_fn = os.link if will_unlink else shutil.copy2
+                shutil.copytree(file_path, backup_path, copy_function=copy_fn)
+            else:
+                self._copy_fast(file_path, backup_path, link_ok=will_unlink)
             
-            # 复制文件
-            shutil.copy2(file_path, backup_path)
-            
-            self.cleanup_report['files_backed_up'].append({
-                'original': str(file_path),
-                'backup': str(backup_path),
-                'reason': reason
-            })
+            with self._report_lock:
+                self.cleanup_report['files_backed_up'].append({
+                    'original': str(file_path),
+                    'backup': str(backup_path),
+                    'reason': reason
+                })
             
-            print(f"  📦 已备份: {relative_path}")
+            print(f"  📦 已备份: {self._rel(file_path)}")
             return True
             
         except Exception as e:
             error_msg = f"备份文件失败 {file_path}: {e}"
-            self.cleanup_report['errors'].append(error_msg)
+            with self._report_lock:
+                self.cleanup_report['errors'].append(error_msg)
             print(f"  ❌ {error_msg}")
             return False
     
+    def _copy_fast(self, src: Path, dst: Path, link_ok: bool = False) -> None:
+        """分层选择最快的复制路径: 硬链接 → copy_file_range → sendfile复制
+
+        全部失败时回退到shutil.copy2。成功复制后用copystat保留
+        mtime/权限，备份仍可用于事后排查。
+        """
+        # 同文件系统上硬链接是O(1)的纯元数据操作，无需逐字节复制；
+        # 仅在原名随后会被unlink时安全(link_ok)，原地修改场景必须真复制
+        if link_ok:
+            try:
+                os.link(src, dst)
+                return
+            except OSError:
+                pass
+
+        # Linux 4.5+: 内核内拷贝，CoW文件系统(btrfs/XFS)上是reflink
+        if hasattr(os, "copy_file_range"):
+            try:
+                with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+                    size = os.fstat(fsrc.fileno()).st_size
+                    copied = 0
+                    while copied < size:
+                        n = os.copy_file_range(fsrc.fileno(), fdst.fileno(), size - copied)
+                        if n == 0:
+                            break
+                        copied += n
+                shutil.copystat(src, dst)
+                return
+            except OSError:
+                dst.unlink(missing_ok=True)
+
+        # copyfile在Linux上内部使用sendfile零拷贝
+        try:
+            shutil.copyfile(src, dst)
+            shutil.copystat(src, dst)
+        except OSError:
+            shutil.copy2(src, dst)
+
     def remove_file(self, file_path: Path, reason: str = ""):
         """安全删除文件"""
         if not file_path.exists():
@@ -68,83 +146,120 @@ class CodeCleaner:
         
         try:
             # 先备份
-            if self.create_backup(file_path, f"删除前备份: {reason}"):
+            if self.create_backup(file_path, f"删除前备份: {reason}", will_unlink=True):
                 file_path.unlink()
                 
-                self.cleanup_report['files_removed'].append({
-                    'path': str(file_path),
-                    'reason': reason
-                })
+                with self._report_lock:
+                    self.cleanup_report['files_removed'].append({
+                        'path': str(file_path),
+                        'reason': reason
+                    })
                 
-                print(f"  🗑️ 已删除: {file_path.relative_to(project_root)}")
+                print(f"  🗑️ 已删除: {self._rel(file_path)}")
                 return True
             else:
-                print(f"  ⚠️ 备份失败，跳过删除: {file_path.relative_to(project_root)}")
+                print(f"  ⚠️ 备份失败，跳过删除: {self._rel(file_path)}")
                 return False
                 
         except Exception as e:
             error_msg = f"删除文件失败 {file_path}: {e}"
-            self.cleanup_report['errors'].append(error_msg)
+            with self._report_lock:
+                self.cleanup_report['errors'].append(error_msg)
             print(f"  ❌ {error_msg}")
             return False
     
-    def remove_directory(self, dir_path: Path, reason: str = ""):
+    def remove_directory(self, dir_path: Path, reason: str = "", skip_backup: bool = False):
         """安全删除目录"""
         if not dir_path.exists() or not dir_path.is_dir():
             return False
-        
+
         try:
-            # 备份整个目录
-            if self.create_backup(dir_path, f"删除目录前备份: {reason}"):
-                shutil.rmtree(dir_path)
+            # 备份整个目录(可再生目录如__pycache__可显式跳过)
+            if skip_backup or self.create_backup(dir_path, f"删除目录前备份: {reason}", will_unlink=True):
+                # ignore_errors: 个别被占用的文件(常见于Windows)不应中断整批清理
+                shutil.rmtree(dir_path, ignore_errors=True)
                 
-                self.cleanup_report['files_removed'].append({
-                    'path': str(dir_path),
-                    'type': 'directory',
-                    'reason': reason
-                })
+                with self._report_lock:
+                    self.cleanup_report['files_removed'].append({
+                        'path': str(dir_path),
+                        'type': 'directory',
+                        'reason': reason
+                    })
                 
-                print(f"  🗑️ 已删除目录: {dir_path.relative_to(project_root)}")
+                print(f"  🗑️ 已删除目录: {self._rel(dir_path)}")
                 return True
             else:
-                print(f"  ⚠️ 备份失败，跳过删除目录: {dir_path.relative_to(project_root)}")
+                print(f"  ⚠️ 备份失败，跳过删除目录: {self._rel(dir_path)}")
                 return False
                 
         except Exception as e:
             error_msg = f"删除目录失败 {dir_path}: {e}"
-            self.cleanup_report['errors'].append(error_msg)
+            with self._report_lock:
+                self.cleanup_report['errors'].append(error_msg)
             print(f"  ❌ {error_msg}")
             return False
     
-    def clean_cache_files(self):
-        """清理缓存文件"""
+    def clean_cache_files(self, fast_check: bool = False):
+        """清理缓存文件
+
+        fast_check=True时先对项目根目录做一次浅层探测，顶层没有任何
+        缓存就直接返回(干净的CI检出场景)。探测只看顶层，深层缓存可能
+        漏检，因此默认关闭。
+        """
         print("🧹 清理Python缓存文件...")
-        
-        cache_patterns = [
-            "**/__pycache__",
-            "**/*.pyc",
-            "**/*.pyo",
-            "**/*.pyd"
-        ]
-        
+
+        if fast_check:
+            with os.scandir(project_root) as it:
+                if not any(
+                    e.name == "__pycache__" or e.name.endswith(_CACHE_SUFFIXES)
+                    for e in it
+                ):
+                    self.cleanup_report['actions'].append({
+                        'action': 'clean_cache_files',
+                        'removed_count': 0
+                    })
+                    print("  ✅ 顶层未发现缓存，跳过全量扫描")
+                    return
+
+        # 先物化所有匹配项，再并行分发删除——备份+删除是纯I/O，
+        # 多线程可重叠syscall延迟
+        cache_paths = list(self._iter_cache_paths())
+
         removed_count = 0
-        
-        for pattern in cache_patterns:
-            for cache_path in project_root.glob(pattern):
-                if cache_path.is_dir():
-                    if self.remove_directory(cache_path, "Python缓存目录"):
-                        removed_count += 1
-                elif cache_path.is_file():
-                    if self.remove_file(cache_path, "Python缓存文件"):
-                        removed_count += 1
-        
+        if cache_paths:
+            with ThreadPoolExecutor(max_workers=32) as executor:
+                removed_count = sum(executor.map(self._delete_one, cache_paths))
+
         self.cleanup_report['actions'].append({
             'action': 'clean_cache_files',
             'removed_count': removed_count
         })
         
         print(f"  ✅ 清理了 {removed_count} 个缓存文件/目录")
-    
+
+    def _iter_cache_paths(self):
+        """单次os.walk遍历找出全部缓存目录/文件
+
+        代替对 **/__pycache__、**/*.py[cod] 各跑一次的4趟递归glob，
+        目录遍历的syscall开销降为1/4。
+        """
+        for dirpath, dirnames, filenames in os.walk(project_root):
+            if "__pycache__" in dirnames:
+                yield Path(dirpath) / "__pycache__"
+                # 整个目录都会被删除，无需再深入遍历
+                dirnames.remove("__pycache__")
+            for fn in filenames:
+                if fn.endswith(_CACHE_SUFFIXES):
+                    yield Path(dirpath) / fn
+
+    def _delete_one(self, cache_path: Path) -> bool:
+        """删除单个缓存文件/目录（供线程池调用）"""
+        if cache_path.is_dir():
+            return self.remove_directory(cache_path, "Python缓存目录", skip_backup=True)
+        if cache_path.is_file():
+            return self.remove_file(cache_path, "Python缓存文件")
+        return False
+
     def clean_log_files(self):
         """清理临时日志文件"""
         print("📝 清理临时日志文件...")
@@ -155,24 +270,29 @@ class CodeCleaner:
             return
         
         # 保留最新的报告，删除旧的
-        log_files = list(logs_dir.glob("*.json"))
-        log_files.sort(key=lambda x: x.stat().st_mtime, reverse=True)
-        
-        # 保留最新的3个文件
+        # scandir返回带缓存stat的DirEntry；top-K用nlargest是O(N log K)，
+        # 无需对全部文件做完整排序
         files_to_keep = 3
+        with os.scandir(logs_dir) as it:
+            entries = [e for e in it if e.name.endswith(".json") and e.is_file()]
+        keepers = {
+            e.path
+            for e in heapq.nlargest(files_to_keep, entries, key=lambda e: e.stat().st_mtime)
+        }
+
         removed_count = 0
-        
-        for log_file in log_files[files_to_keep:]:
-            if self.remove_file(log_file, "旧的测试报告文件"):
-                removed_count += 1
-        
+        for entry in entries:
+            if entry.path not in keepers:
+                if self.remove_file(Path(entry.path), "旧的测试报告文件"):
+                    removed_count += 1
+
         self.cleanup_report['actions'].append({
             'action': 'clean_log_files',
             'removed_count': removed_count,
-            'kept_count': min(len(log_files), files_to_keep)
+            'kept_count': min(len(entries), files_to_keep)
         })
-        
-        print(f"  ✅ 清理了 {removed_count} 个旧日志文件，保留最新 {min(len(log_files), files_to_keep)} 个")
+
+        print(f"  ✅ 清理了 {removed_count} 个旧日志文件，保留最新 {min(len(entries), files_to_keep)} 个")
     
     def update_config_py(self):
         """更新config.py为纯兼容层"""
@@ -207,9 +327,14 @@ warnings.warn(
 '''
         
         try:
-            with open(config_py_path, 'w', encoding='utf-8') as f:
+            # 写临时文件再os.replace换名：新内容落在新inode上，
+            # 原地open(..., 'w')会截断原inode——备份若是硬链接会被一并清空；
+            # 换名同时保证读到的config.py要么全旧要么全新
+            tmp_path = config_py_path.with_suffix('.py.tmp')
+            with open(tmp_path, 'w', encoding='utf-8') as f:
                 f.write(new_content)
-            
+            os.replace(tmp_path, config_py_path)
+
             self.cleanup_report['files_modified'].append({
                 'path': str(config_py_path),
                 'action': 'updated_to_compatibility_layer'
@@ -312,10 +437,14 @@ warnings.warn(
                 with open(gitignore_path, 'r', encoding='utf-8') as f:
                     existing_content = f.read()
             
+            # 按整行做集合查找——既是O(1)匹配，也避免子串误判
+            # (如规则恰好出现在某行注释中)
+            existing_lines = {line.rstrip() for line in existing_content.splitlines()}
+
             # 检查哪些规则需要添加
             new_rules = []
             for rule in ignore_rules:
-                if rule and rule not in existing_content:
+                if rule and rule not in existing_lines:
                     new_rules.append(rule)
             
             if new_rules:
@@ -350,12 +479,19 @@ warnings.warn(
         print("\n📊 生成清理报告...")
         
         # 保存详细报告
-        report_path = project_root / "logs" / f"cleanup_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        report_path = project_root / "logs" / f"cleanup_report_{self._run_ts.strftime('%Y%m%d_%H%M%S')}.json"
         report_path.parent.mkdir(exist_ok=True)
         
         try:
-            with open(report_path, 'w', encoding='utf-8') as f:
-                json.dump(self.cleanup_report, f, indent=2, ensure_ascii=False)
+            # 先在内存中序列化为bytes再一次性写入，避免json.dump
+            # 逐片段write带来的大量小写操作
+            if orjson is not None:
+                data = orjson.dumps(self.cleanup_report, option=orjson.OPT_INDENT_2)
+            else:
+                data = json.dumps(
+                    self.cleanup_report, indent=2, ensure_ascii=False
+                ).encode('utf-8')
+            report_path.write_bytes(data)
             
             print(f"✅ 详细报告已保存: {report_path}")
             
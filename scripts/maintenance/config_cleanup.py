@@ -6,7 +6,9 @@
 """
 import sys
 import os
+import re
 import shutil
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
 
@@ -14,6 +16,31 @@ from datetime import datetime
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 旧导入模式合并为一个多分支正则，整个文件只需扫描一遍
+_OLD_IMPORT_RE = re.compile(
+    r'(from config\.config import|import config\.config|from config import config)'
+)
+
+def _copy_config_file(source: Path, dest: Path):
+    """复制单个配置文件，数据面尽量走内核
+
+    os.copy_file_range在内核内搬运数据(CoW文件系统上可直接reflink)，
+    不可用或跨设备时回退到shutil.copyfile；最后补上copy2的元数据语义。
+    """
+    try:
+        with open(source, 'rb') as fsrc, open(dest, 'wb') as fdst:
+            remaining = os.fstat(fsrc.fileno()).st_size
+            while remaining > 0:
+                copied = os.copy_file_range(fsrc.fileno(), fdst.fileno(), remaining)
+                if copied == 0:
+                    break
+                remaining -= copied
+            if remaining > 0:
+                shutil.copyfileobj(fsrc, fdst)
+    except (AttributeError, OSError):
+        shutil.copyfile(source, dest)
+    shutil.copystat(source, dest)
+
 def backup_config_files():
     """备份现有配置文件"""
     print("📦 备份现有配置文件...")
@@ -31,7 +58,7 @@ def backup_config_files():
         source = project_root / config_file
         if source.exists():
             dest = backup_dir / source.name
-            shutil.copy2(source, dest)
+            _copy_config_file(source, dest)
             backed_up_files.append(str(dest))
             print(f"  ✅ 备份: {config_file} -> {dest}")
 
@@ -74,49 +101,67 @@ warnings.warn(
         print(f"❌ 更新 config.py 失败: {e}")
         return False
 
-def scan_and_report_imports():
-    """扫描并报告需要更新的导入"""
-    print("🔍 扫描需要更新的导入...")
+def _iter_python_files():
+    """遍历项目中的.py文件，产出原始路径字符串
 
-    python_files = []
-    for pattern in ["*.py", "**/*.py"]:
-        python_files.extend(project_root.glob(pattern))
+    os.walk直接消费getdents结果，不为每个条目构造Path对象；
+    config_backup和点目录在目录层就剪枝，不再逐文件过滤。
+    """
+    for dirpath, dirnames, filenames in os.walk(project_root):
+        dirnames[:] = [d for d in dirnames if d != 'config_backup' and not d.startswith('.')]
+        for filename in filenames:
+            if filename.endswith('.py') and not filename.startswith('.'):
+                yield os.path.join(dirpath, filename)
 
-    files_with_old_imports = []
+def _scan_one(py_file):
+    """扫描单个文件的旧导入(供线程池调用)
 
-    for py_file in python_files:
-        if py_file.name.startswith('.') or 'config_backup' in str(py_file):
-            continue
+    文件读取会释放GIL，bytes正则扫描也很快，因此逐文件扫描
+    可以安全地多线程并行。
+    """
+    try:
+        with open(py_file, 'rb') as f:
+            data = f.read()
 
-        try:
-            with open(py_file, 'r', encoding='utf-8') as f:
-                content = f.read()
+        # bytes级预过滤：绝大多数文件不含旧导入，
+        # 无需付出UTF-8解码和正则扫描的代价
+        if (b'config.config' not in data
+                and b'from config import config' not in data):
+            return None
 
-            # 检查旧的导入模式
-            old_patterns = [
-                'from config.config import',
-                'import config.config',
-                'from config import config'
-            ]
+        content = data.decode('utf-8', errors='replace')
 
-            found_patterns = []
-            for pattern in old_patterns:
-                if pattern in content:
-                    found_patterns.append(pattern)
+        # 检查旧的导入模式(单次正则扫描代替逐模式子串搜索)
+        found_patterns = sorted({m.group(1) for m in _OLD_IMPORT_RE.finditer(content)})
+
+        if found_patterns:
+            return {
+                'file': py_file,
+                'patterns': found_patterns
+            }
+
+    except Exception as e:
+        print(f"⚠️ 无法读取文件 {py_file}: {e}")
+
+    return None
+
+def scan_and_report_imports():
+    """扫描并报告需要更新的导入"""
+    print("🔍 扫描需要更新的导入...")
 
-            if found_patterns:
-                files_with_old_imports.append({
-                    'file': py_file,
-                    'patterns': found_patterns
-                })
+    python_files = list(_iter_python_files())
 
-        except Exception as e:
-            print(f"⚠️ 无法读取文件 {py_file}: {e}")
+    # 文件扫描是彼此独立的纯I/O，用线程池重叠读取延迟
+    with ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 4) * 4)) as executor:
+        files_with_old_imports = [
+            result for result in executor.map(_scan_one, python_files)
+            if result is not None
+        ]
 
     if files_with_old_imports:
         print("\n📋 发现以下文件仍使用旧的导入模式:")
         for item in files_with_old_imports:
-            print(f"  📄 {item['file'].relative_to(project_root)}")
+            print(f"  📄 {os.path.relpath(item['file'], project_root)}")
             for pattern in item['patterns']:
                 print(f"    - {pattern}")
 
@@ -15,13 +15,21 @@ sys.path.insert(0, str(project_root))
 
 from config.settings import Settings, Environment
 
+# settings单例在模块导入时获取一次，避免每次调用都走importlib查找；
+# 加载失败不应拖垮整个CLI，留到具体命令里报告
+try:
+    from config.settings import settings
+except Exception:  # pragma: no cover - 取决于运行环境
+    settings = None
+
 def show_current_config():
     """显示当前配置"""
     print("🔧 当前配置状态")
     print("=" * 50)
 
     try:
-        from config.settings import settings
+        if settings is None:
+            raise ImportError("config.settings 加载失败")
 
         print(f"环境: {settings.environment.value}")
         print(f"命令前缀: {settings.bot.command_prefix}")
@@ -72,34 +80,42 @@ def show_environment_details(env_name: str):
         print(f"❌ 未知环境: {env_name}")
         print("使用 'list' 命令查看可用环境")
 
+def _parse_env_file(text: str) -> Dict[str, str]:
+    """把.env内容解析为有序映射(py3.7+的dict保证插入序)
+
+    ``KEY=VALUE`` 行以键索引，注释和空行以 ``__raw_<行号>__``
+    占位键原样保留，序列化时按原顺序还原。
+    """
+    entries: Dict[str, str] = {}
+    for lineno, line in enumerate(text.splitlines()):
+        if '=' in line and not line.lstrip().startswith('#'):
+            key, value = line.split('=', 1)
+            entries[key] = value
+        else:
+            entries[f'__raw_{lineno}__'] = line
+    return entries
+
+def _serialize_env_file(entries: Dict[str, str]) -> str:
+    """把解析后的映射序列化回.env文本"""
+    return '\n'.join(
+        value if key.startswith('__raw_') else f'{key}={value}'
+        for key, value in entries.items()
+    ) + '\n'
+
 def set_environment(env_name: str):
     """设置环境变量"""
     try:
         env = Environment(env_name)
 
-        # 创建或更新 .env 文件
+        # 创建或更新 .env 文件：解析成键值映射后O(1)更新，
+        # 多个键需要变更时也只需一次解析/序列化往返
         env_file = project_root / ".env"
+        text = env_file.read_text(encoding='utf-8') if env_file.exists() else ''
 
-        # 读取现有内容
-        existing_lines = []
-        if env_file.exists():
-            with open(env_file, 'r', encoding='utf-8') as f:
-                existing_lines = f.readlines()
+        entries = _parse_env_file(text)
+        entries['BOT_ENVIRONMENT'] = env_name
 
-        # 更新或添加 BOT_ENVIRONMENT
-        updated = False
-        for i, line in enumerate(existing_lines):
-            if line.startswith('BOT_ENVIRONMENT='):
-                existing_lines[i] = f'BOT_ENVIRONMENT={env_name}\n'
-                updated = True
-                break
-
-        if not updated:
-            existing_lines.append(f'BOT_ENVIRONMENT={env_name}\n')
-
-        # 写回文件
-        with open(env_file, 'w', encoding='utf-8') as f:
-            f.writelines(existing_lines)
+        env_file.write_text(_serialize_env_file(entries), encoding='utf-8')
 
         print(f"✅ 环境已设置为: {env_name}")
         print(f"📝 已更新 .env 文件")
@@ -115,7 +131,8 @@ def validate_config():
     print("=" * 50)
 
     try:
-        from config.settings import settings
+        if settings is None:
+            raise ImportError("config.settings 加载失败")
 
         if settings.validate():
             print("✅ 配置验证通过")
@@ -128,8 +145,16 @@ def validate_config():
         print(f"❌ 配置验证出错: {e}")
         return False
 
-def compare_environments(env1: str, env2: str):
-    """比较两个环境的配置差异"""
+# 区分"未设置"与显式的None/空值的哨兵对象
+_MISSING = object()
+
+def compare_environments(env1: str, env2: str, show_equal: bool = False):
+    """比较两个环境的配置差异
+
+    默认只输出有差异的配置项(相同项通常占绝大多数，
+    逐项打印的stdout刷新反而是这里的主要开销)；
+    ``show_equal=True`` 恢复旧的逐项输出行为。
+    """
     try:
         env1_obj = Environment(env1)
         env2_obj = Environment(env2)
@@ -141,29 +166,37 @@ def compare_environments(env1: str, env2: str):
         print("=" * 50)
 
         # 比较每个配置类别
-        all_categories = set(config1.keys()) | set(config2.keys())
+        all_categories = config1.keys() | config2.keys()
 
         for category in sorted(all_categories):
             if category == "description":
                 continue
 
-            print(f"\n{category.upper()}:")
-
             settings1 = config1.get(category, {})
             settings2 = config2.get(category, {})
 
-            all_keys = set(settings1.keys()) | set(settings2.keys())
+            # 单次字典推导计算差异，跳过相同项
+            diff = {
+                key: (settings1.get(key, _MISSING), settings2.get(key, _MISSING))
+                for key in settings1.keys() | settings2.keys()
+                if settings1.get(key, _MISSING) != settings2.get(key, _MISSING)
+            }
+
+            if not diff and not show_equal:
+                continue
+
+            print(f"\n{category.upper()}:")
 
-            for key in sorted(all_keys):
-                val1 = settings1.get(key, "未设置")
-                val2 = settings2.get(key, "未设置")
+            if show_equal:
+                for key in sorted(settings1.keys() | settings2.keys()):
+                    if key not in diff:
+                        print(f"  {key}: {settings1.get(key)} (相同)")
 
-                if val1 != val2:
-                    print(f"  {key}:")
-                    print(f"    {env1}: {val1}")
-                    print(f"    {env2}: {val2}")
-                else:
-                    print(f"  {key}: {val1} (相同)")
+            for key in sorted(diff):
+                val1, val2 = diff[key]
+                print(f"  {key}:")
+                print(f"    {env1}: {'未设置' if val1 is _MISSING else val1}")
+                print(f"    {env2}: {'未设置' if val2 is _MISSING else val2}")
 
     except ValueError as e:
         print(f"❌ 环境名称错误: {e}")
@@ -194,6 +227,7 @@ def main():
     compare_parser = subparsers.add_parser('compare', help='比较两个环境的配置')
     compare_parser.add_argument('env1', help='第一个环境')
     compare_parser.add_argument('env2', help='第二个环境')
+    compare_parser.add_argument('--show-equal', action='store_true', help='同时输出相同的配置项')
 
     args = parser.parse_args()
 
@@ -208,7 +242,7 @@ def main():
     elif args.command == 'validate':
         validate_config()
     elif args.command == 'compare':
-        compare_environments(args.env1, args.env2)
+        compare_environments(args.env1, args.env2, show_equal=args.show_equal)
     else:
         parser.print_help()
 
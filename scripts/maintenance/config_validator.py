@@ -12,7 +12,8 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
-from config.settings import settings
+# 一次性导入全部所需符号，各测试函数不再重复触发importlib查找
+from config.settings import settings, Settings, Environment, SearchConfig, CacheConfig
 
 def test_config_loading():
     """测试配置加载"""
@@ -59,15 +60,13 @@ def test_environment_variables():
         'USE_REDIS_CACHE': 'true'
     }
 
-    # 临时设置环境变量
-    original_env = {}
-    for key, value in test_env.items():
-        original_env[key] = os.environ.get(key)
-        os.environ[key] = value
+    # 整体快照后批量写入，恢复时按快照回放，
+    # 避免逐键get/putenv往返，try/finally下恢复也是原子的
+    snapshot = dict(os.environ)
+    os.environ.update(test_env)
 
     try:
-        # 重新加载配置
-        from config.settings import Settings
+        # 重新加载配置(load_from_env本身是工厂调用，无需重新导入)
         test_settings = Settings.load_from_env()
 
         # 验证环境变量是否生效
@@ -78,12 +77,14 @@ def test_environment_variables():
         print("✅ 环境变量覆盖测试通过")
 
     finally:
-        # 恢复原始环境变量
-        for key, value in original_env.items():
-            if value is None:
-                os.environ.pop(key, None)
+        # 恢复原始环境变量(只回滚本测试动过的键)
+        for key in test_env:
+            if key in snapshot:
+                os.environ[key] = snapshot[key]
             else:
-                os.environ[key] = value
+                os.environ.pop(key, None)
+        # 环境变量已变动，失效按环境缓存的配置
+        Settings.load_for_environment.cache_clear()
 
 def test_config_validation():
     """测试配置验证"""
@@ -93,8 +94,6 @@ def test_config_validation():
     assert settings.validate(), "有效配置验证失败"
 
     # 测试无效配置
-    from config.settings import Settings, SearchConfig, CacheConfig
-
     invalid_settings = Settings()
     invalid_settings.search = SearchConfig(
         max_messages_per_search=-1,  # 无效值
@@ -111,8 +110,6 @@ def test_environment_loading():
     print("📁 测试环境配置加载...")
 
     # 测试所有可用环境
-    from config.settings import Settings, Environment
-
     environments = [
         Environment.DEFAULT,
         Environment.LARGE_SERVER,
@@ -3,85 +3,174 @@
 README文档质量验证脚本
 验证README.md和README_zh.md的格式和内容质量
 """
+import mmap
 import re
 import sys
+from bisect import bisect_right
+from contextlib import contextmanager
+from dataclasses import dataclass, field
 from pathlib import Path
 
+# 规则用到的正则在模块加载时编译一次，
+# 校验时对整个文件缓冲单次finditer扫描，而不是逐行re调用。
+# 模式全部是bytes级的，直接作用于mmap缓冲，
+# 只有需要写进警告信息的片段才解码成str
+_H1_RE = re.compile(rb'(?m)^# [^#]')
+_FENCE_RE = re.compile(rb'(?m)^[ \t]*```(\w*)')
+_LINK_RE = re.compile(rb'\[([^\]]+)\]\(([^)]+)\)')
+_HEADING_RE = re.compile(rb'(?m)^(#{1,6})(?!#)')
+_TABLE_RE = re.compile(rb'(?m)^(?!\s*\xe2\x94\x82)[^|\n]*\|[^|\n]*$')  # \xe2\x94\x82 = '│'
+_NEWLINE_RE = re.compile(rb'\n')
+_WORD_RE = re.compile(rb'\S+')
+_SECTION_RE = re.compile(rb'(?m)^## (.+)')
+
+@contextmanager
+def _mapped(filepath):
+    """以只读mmap打开文件，逐字节扫描而不把内容复制进堆
+
+    空文件无法mmap，退化为一次性read。
+    """
+    with open(filepath, 'rb') as f:
+        try:
+            buf = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            yield f.read()
+            return
+        try:
+            yield buf
+        finally:
+            buf.close()
+
+@dataclass
+class MarkdownCtx:
+    """单个文件的预计算校验上下文
+
+    换行偏移表和代码块区间只计算一次，各条规则作为纯函数
+    复用同一份上下文，不再各自重新遍历文件。
+    """
+    content: bytes        # mmap或bytes缓冲
+    newline_offsets: list
+    fences: list          # 全部围栏匹配，偶数下标为开围栏
+    code_starts: list
+    code_ends: list
+    issues: list = field(default_factory=list)
+    warnings: list = field(default_factory=list)
+
+    @classmethod
+    def from_content(cls, content):
+        newline_offsets = [m.end() for m in _NEWLINE_RE.finditer(content)]
+        # 代码块区间一次算好：相邻围栏配对成[开, 闭)的偏移区间
+        fences = list(_FENCE_RE.finditer(content))
+        return cls(
+            content=content,
+            newline_offsets=newline_offsets,
+            fences=fences,
+            code_starts=[m.start() for m in fences[0::2]],
+            code_ends=[m.end() for m in fences[1::2]],
+        )
+
+    def line_of(self, pos):
+        """偏移量到行号(1起)的翻译，单次二分查找"""
+        return bisect_right(self.newline_offsets, pos) + 1
+
+    def in_code(self, pos):
+        """偏移量是否落在代码块内(含最后一个未闭合围栏之后)"""
+        idx = bisect_right(self.code_starts, pos) - 1
+        if idx < 0:
+            return False
+        return idx >= len(self.code_ends) or pos < self.code_ends[idx]
+
+def _check_h1_headings(ctx):
+    """H1标题数量检查(MD025)，跳过代码块内的匹配；返回H1数量"""
+    h1_count = 0
+    for m in _H1_RE.finditer(ctx.content):
+        if ctx.in_code(m.start()):
+            continue
+        h1_count += 1
+        if h1_count > 1:
+            ctx.issues.append(f"第{ctx.line_of(m.start())}行: 发现多个H1标题 (MD025)")
+    return h1_count
+
+def _check_trailing_newline(ctx):
+    """文件结尾换行符检查(MD047)
+
+    mmap对象没有endswith，用尾部切片比较(只复制1-2字节)。
+    """
+    if ctx.content[-1:] != b'\n':
+        ctx.issues.append("文件应以单个换行符结尾 (MD047)")
+    elif ctx.content[-2:] == b'\n\n':
+        ctx.warnings.append("文件以多个换行符结尾，建议只保留一个")
+
+def _check_fence_languages(ctx):
+    """开围栏(偶数下标)缺少语言标识时告警"""
+    for m in ctx.fences[0::2]:
+        if not m.group(1):
+            ctx.warnings.append(f"第{ctx.line_of(m.start())}行: 代码块缺少语言标识")
+
+def _check_links(ctx):
+    """链接格式检查
+
+    先用C级子串查找探测常见情形(文件里根本没有链接)，
+    命中才进入正则扫描。
+    """
+    if ctx.content.find(b'](') < 0:
+        return
+    for m in _LINK_RE.finditer(ctx.content):
+        link_url = m.group(2)
+        if not link_url.startswith((b'http', b'#', b'/')):
+            url = link_url.decode('utf-8', errors='replace')
+            ctx.warnings.append(f"第{ctx.line_of(m.start())}行: 可能的无效链接 '{url}'")
+
+def _check_tables(ctx):
+    """表格格式检查(整行只有一个'|'的疑似坏表格)
+
+    正则一次扫描直接给出违例候选，好文件上规则零Python开销；
+    代码块里的管道符(shell管道等)不算表格；
+    整个文件没有'|'时直接短路，不启动正则。
+    """
+    if ctx.content.find(b'|') < 0:
+        return
+    for m in _TABLE_RE.finditer(ctx.content):
+        if ctx.in_code(m.start()):
+            continue
+        ctx.warnings.append(f"第{ctx.line_of(m.start())}行: 表格格式可能不正确")
+
+def _check_heading_levels(ctx):
+    """标题层级跳跃检查(代码块内的#是注释，不参与层级判断)"""
+    if ctx.content.find(b'#') < 0:
+        return
+    prev_level = 0
+    for m in _HEADING_RE.finditer(ctx.content):
+        if ctx.in_code(m.start()):
+            continue
+        level = len(m.group(1))
+        if level > prev_level + 1:
+            ctx.warnings.append(
+                f"第{ctx.line_of(m.start())}行: 标题层级跳跃过大 (从H{prev_level}到H{level})"
+            )
+        prev_level = level
+
 def validate_markdown_file(filepath):
     """验证单个Markdown文件"""
     print(f"🔍 验证文件: {filepath}")
 
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
+    with _mapped(filepath) as content:
+        ctx = MarkdownCtx.from_content(content)
 
-    lines = content.split('\n')
-    issues = []
-    warnings = []
+        h1_count = _check_h1_headings(ctx)
+        _check_trailing_newline(ctx)
+        _check_fence_languages(ctx)
+        _check_links(ctx)
+        _check_tables(ctx)
+        _check_heading_levels(ctx)
 
-    # 1. 检查H1标题数量
-    h1_count = 0
-    in_code_block = False
-    for i, line in enumerate(lines, 1):
-        # 检查是否在代码块中
-        if line.strip().startswith('```'):
-            in_code_block = not in_code_block
-            continue
-
-        # 只在非代码块中检查H1标题
-        if not in_code_block and re.match(r'^# [^#]', line):
-            h1_count += 1
-            if h1_count > 1:
-                issues.append(f"第{i}行: 发现多个H1标题 (MD025)")
-
-    # 2. 检查文件结尾换行符
-    if not content.endswith('\n'):
-        issues.append("文件应以单个换行符结尾 (MD047)")
-    elif content.endswith('\n\n'):
-        warnings.append("文件以多个换行符结尾，建议只保留一个")
-
-    # 3. 检查代码块格式
-    in_code_block = False
-    code_block_lang = None
-    for i, line in enumerate(lines, 1):
-        if line.startswith('```'):
-            if not in_code_block:
-                in_code_block = True
-                # 检查代码块语言标识
-                lang_match = re.match(r'^```(\w+)?', line)
-                if lang_match:
-                    code_block_lang = lang_match.group(1)
-                    if not code_block_lang:
-                        warnings.append(f"第{i}行: 代码块缺少语言标识")
-            else:
-                in_code_block = False
-                code_block_lang = None
-
-    # 4. 检查链接格式
-    link_pattern = r'\[([^\]]+)\]\(([^)]+)\)'
-    for i, line in enumerate(lines, 1):
-        links = re.findall(link_pattern, line)
-        for link_text, link_url in links:
-            if not link_url.startswith(('http', '#', '/')):
-                warnings.append(f"第{i}行: 可能的无效链接 '{link_url}'")
-
-    # 5. 检查表格格式
-    for i, line in enumerate(lines, 1):
-        if '|' in line and not line.strip().startswith('│'):  # Markdown表格
-            if line.count('|') < 2:
-                warnings.append(f"第{i}行: 表格格式可能不正确")
-
-    # 6. 检查标题层级
-    prev_level = 0
-    for i, line in enumerate(lines, 1):
-        if line.startswith('#'):
-            level = len(line) - len(line.lstrip('#'))
-            if level > prev_level + 1:
-                warnings.append(f"第{i}行: 标题层级跳跃过大 (从H{prev_level}到H{level})")
-            prev_level = level
+        # 检查内容质量指标(正则计数，不为分词物化整份内容)
+        word_count = sum(1 for _ in _WORD_RE.finditer(content))
+        section_count = sum(1 for _ in _SECTION_RE.finditer(content))
 
-    # 7. 检查内容质量指标
-    word_count = len(content.split())
-    line_count = len(lines)
+    issues = ctx.issues
+    warnings = ctx.warnings
+    line_count = len(ctx.newline_offsets) + 1
 
     print(f"  📊 统计信息:")
     print(f"    - 总行数: {line_count}")
@@ -102,34 +191,34 @@ def validate_markdown_file(filepath):
     if not issues and not warnings:
         print(f"  ✅ 文件格式完美!")
 
-    return len(issues) == 0
+    # 一致性比较需要的统计随手带出，避免第二次读取文件
+    stats = {
+        'sections': section_count,
+        'code_fences': len(ctx.fences)
+    }
+    return len(issues) == 0, stats
 
-def validate_content_completeness(readme_en, readme_zh):
-    """验证中英文版本内容完整性"""
-    print(f"\n🔄 验证中英文版本一致性:")
+def validate_content_completeness(en_stats, zh_stats):
+    """验证中英文版本内容完整性
 
-    with open(readme_en, 'r', encoding='utf-8') as f:
-        en_content = f.read()
-
-    with open(readme_zh, 'r', encoding='utf-8') as f:
-        zh_content = f.read()
+    直接比较validate_markdown_file随验证带出的统计，
+    不再把两个文件各自重新读一遍。
+    """
+    print(f"\n🔄 验证中英文版本一致性:")
 
-    # 检查主要章节是否都存在
-    en_sections = re.findall(r'^## (.+)', en_content, re.MULTILINE)
-    zh_sections = re.findall(r'^## (.+)', zh_content, re.MULTILINE)
+    en_sections = en_stats['sections']
+    zh_sections = zh_stats['sections']
+    en_code_blocks = en_stats['code_fences']
+    zh_code_blocks = zh_stats['code_fences']
 
-    print(f"  📝 英文版章节数: {len(en_sections)}")
-    print(f"  📝 中文版章节数: {len(zh_sections)}")
+    print(f"  📝 英文版章节数: {en_sections}")
+    print(f"  📝 中文版章节数: {zh_sections}")
 
-    if len(en_sections) != len(zh_sections):
+    if en_sections != zh_sections:
         print(f"  ⚠️  章节数量不匹配")
     else:
         print(f"  ✅ 章节数量匹配")
 
-    # 检查代码示例数量
-    en_code_blocks = len(re.findall(r'```', en_content))
-    zh_code_blocks = len(re.findall(r'```', zh_content))
-
     print(f"  💻 英文版代码块: {en_code_blocks // 2}")
     print(f"  💻 中文版代码块: {zh_code_blocks // 2}")
 
@@ -157,12 +246,12 @@ def main():
         return False
 
     # 验证各个文件
-    en_valid = validate_markdown_file(readme_en)
+    en_valid, en_stats = validate_markdown_file(readme_en)
     print()
-    zh_valid = validate_markdown_file(readme_zh)
+    zh_valid, zh_stats = validate_markdown_file(readme_zh)
 
-    # 验证内容一致性
-    validate_content_completeness(readme_en, readme_zh)
+    # 验证内容一致性(复用上面验证时带出的统计)
+    validate_content_completeness(en_stats, zh_stats)
 
     # 总结
     print("\n" + "=" * 50)
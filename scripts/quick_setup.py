@@ -5,6 +5,7 @@
 """
 import sys
 import os
+import functools
 import subprocess
 import platform
 from pathlib import Path
@@ -13,6 +14,21 @@ from pathlib import Path
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 操作系统类型整个运行期间不变，取一次即可
+_OS_TYPE = platform.system().lower()
+
+@functools.lru_cache(maxsize=1)
+def _script_names():
+    """scripts目录下的文件名集合
+
+    一次scandir代替各步骤逐个exists()的stat系统调用。
+    """
+    try:
+        with os.scandir(project_root / "scripts") as entries:
+            return frozenset(entry.name for entry in entries)
+    except FileNotFoundError:
+        return frozenset()
+
 def print_header(title):
     """打印标题"""
     print("\n" + "=" * 60)
@@ -24,23 +40,29 @@ def print_step(step, description):
     print(f"\n📋 步骤 {step}: {description}")
 
 def run_command(command, description, check=True):
-    """运行命令"""
+    """运行命令
+
+    stdout直接丢弃而不是capture_output整体缓冲——
+    子进程(如性能基准)的大量进度输出不会在父进程里攒成大字符串，
+    只有失败时需要的stderr被收集。
+    """
     print(f"  🔧 {description}...")
     try:
-        if isinstance(command, str):
-            result = subprocess.run(command, shell=True, check=check, capture_output=True, text=True)
-        else:
-            result = subprocess.run(command, check=check, capture_output=True, text=True)
-        
-        if result.returncode == 0:
+        proc = subprocess.Popen(
+            command,
+            shell=isinstance(command, str),
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            text=True
+        )
+        _, stderr = proc.communicate()
+
+        if proc.returncode == 0:
             print(f"  ✅ {description} 完成")
             return True
         else:
-            print(f"  ❌ {description} 失败: {result.stderr}")
+            print(f"  ❌ {description} 失败: {stderr}")
             return False
-    except subprocess.CalledProcessError as e:
-        print(f"  ❌ {description} 失败: {e}")
-        return False
     except Exception as e:
         print(f"  💥 {description} 出错: {e}")
         return False
@@ -93,7 +115,7 @@ def validate_configuration():
     print_step(4, "验证配置系统")
     
     validator_script = project_root / "scripts" / "config_migration_validator.py"
-    if not validator_script.exists():
+    if validator_script.name not in _script_names():
         print("  ⚠️ 配置验证脚本不存在")
         return False
     
@@ -104,7 +126,7 @@ def run_basic_tests():
     print_step(5, "运行基础测试")
     
     test_script = project_root / "scripts" / "basic_monitoring_test.py"
-    if not test_script.exists():
+    if test_script.name not in _script_names():
         print("  ⚠️ 基础测试脚本不存在")
         return False
     
@@ -115,11 +137,11 @@ def setup_monitoring():
     print_step(6, "设置监控系统")
     
     # 检查操作系统
-    os_type = platform.system().lower()
-    
+    os_type = _OS_TYPE
+
     if os_type in ['linux', 'darwin']:  # Linux 或 macOS
         monitoring_script = project_root / "scripts" / "system_monitoring_setup.sh"
-        if monitoring_script.exists():
+        if monitoring_script.name in _script_names():
             print("  📊 发现系统监控设置脚本")
             print("  💡 要设置完整的系统监控，请运行:")
             print(f"     chmod +x {monitoring_script}")
@@ -182,7 +204,7 @@ def run_performance_test():
     print_step(8, "运行性能基准测试")
     
     perf_script = project_root / "scripts" / "performance_benchmark.py"
-    if not perf_script.exists():
+    if perf_script.name not in _script_names():
         print("  ⚠️ 性能测试脚本不存在")
         return False
     
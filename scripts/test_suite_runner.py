@@ -7,15 +7,31 @@ import sys
 import asyncio
 import subprocess
 import json
+import threading
 import time
+from collections import Counter, deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 from datetime import datetime
 from typing import Dict, List, Any
 
+try:
+    import orjson  # C实现的序列化，报告落盘比stdlib json的逐字符编码快数倍
+except ImportError:
+    orjson = None
+
 # 添加项目根目录到路径
 project_root = Path(__file__).parent.parent
 sys.path.insert(0, str(project_root))
 
+# 状态图标表是常量，模块级定义一份，报告循环里不再每轮新建dict
+_STATUS_ICON = {
+    'passed': '✅',
+    'failed': '❌',
+    'error': '💥',
+    'timeout': '⏰'
+}
+
 class TestSuiteRunner:
     """测试套件运行器"""
     
@@ -24,8 +40,12 @@ class TestSuiteRunner:
         self.start_time = None
         self.end_time = None
         
-    def run_test_script(self, script_name: str, description: str) -> Dict[str, Any]:
-        """运行测试脚本"""
+    @staticmethod
+    def run_test_script(script_name: str, description: str) -> Dict[str, Any]:
+        """运行测试脚本
+
+        staticmethod且只依赖模块级状态，可直接提交给进程池并行执行。
+        """
         print(f"\n🧪 运行测试: {description}")
         print("=" * 60)
         
@@ -39,45 +59,77 @@ class TestSuiteRunner:
             }
         
         start_time = time.time()
-        
+
+        # 子进程输出边读边落盘，内存里只保留滚动尾部——
+        # 无论子脚本打多少日志，父进程内存和报告体积都是常量级
+        logs_dir = project_root / "logs"
+        logs_dir.mkdir(exist_ok=True)
+        log_path = logs_dir / f"{script_path.stem}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.log"
+        tail = deque(maxlen=500)
+
         try:
             # 运行测试脚本
-            result = subprocess.run(
-                [sys.executable, str(script_path)],
-                cwd=project_root,
-                capture_output=True,
-                text=True,
-                timeout=300  # 5分钟超时
-            )
-            
+            with open(log_path, 'w', encoding='utf-8') as log_file:
+                process = subprocess.Popen(
+                    [sys.executable, str(script_path)],
+                    cwd=project_root,
+                    stdout=subprocess.PIPE,
+                    stderr=subprocess.STDOUT,
+                    bufsize=1,
+                    text=True
+                )
+
+                # 读输出的循环放到后台线程，主线程守在wait(timeout)上——
+                # 若在主线程里for line in stdout，要等子进程关闭管道才轮到
+                # wait执行，超时永远不会触发，挂死的测试会拖垮整个套件
+                def _pump() -> None:
+                    for line in process.stdout:
+                        log_file.write(line)
+                        tail.append(line)
+
+                reader = threading.Thread(target=_pump, daemon=True)
+                reader.start()
+                try:
+                    return_code = process.wait(timeout=300)  # 5分钟超时
+                finally:
+                    # 超时路径先杀进程：管道随之关闭，读线程退出，
+                    # join必须在log_file关闭前完成
+                    if process.poll() is None:
+                        process.kill()
+                        process.wait()
+                    reader.join()
+
             execution_time = time.time() - start_time
-            
-            if result.returncode == 0:
+
+            if return_code == 0:
                 print("✅ 测试通过")
                 return {
                     'status': 'passed',
                     'execution_time': execution_time,
-                    'stdout': result.stdout,
-                    'stderr': result.stderr
+                    'log_file': str(log_path),
+                    'output_tail': ''.join(tail)
                 }
             else:
                 print("❌ 测试失败")
-                print(f"错误输出: {result.stderr}")
+                print(f"输出尾部: {''.join(list(tail)[-10:])}")
                 return {
                     'status': 'failed',
                     'execution_time': execution_time,
-                    'stdout': result.stdout,
-                    'stderr': result.stderr,
-                    'return_code': result.returncode
+                    'log_file': str(log_path),
+                    'output_tail': ''.join(tail),
+                    'return_code': return_code
                 }
-                
+
         except subprocess.TimeoutExpired:
+            # 进程已在finally里被kill，读线程也已join，这里只整理结果
             execution_time = time.time() - start_time
             print("⏰ 测试超时")
             return {
                 'status': 'timeout',
                 'execution_time': execution_time,
-                'error': '测试执行超时'
+                'error': '测试执行超时',
+                'log_file': str(log_path),
+                'output_tail': ''.join(tail)
             }
         except Exception as e:
             execution_time = time.time() - start_time
@@ -88,31 +140,52 @@ class TestSuiteRunner:
                 'error': str(e)
             }
     
-    def run_all_tests(self):
-        """运行所有测试"""
+    def run_all_tests(self, sequential: bool = False):
+        """运行所有测试
+
+        Args:
+            sequential: 逐个顺序执行(测试间有共享状态冲突时使用)；
+                默认各脚本互相独立，提交进程池并行跑，
+                总耗时接近最慢一项而非各项之和
+        """
         print("🚀 开始完整测试套件")
         print("=" * 80)
-        
+
         self.start_time = datetime.now()
-        
+
         # 定义测试套件
         test_suite = [
             ('config_migration_validator.py', '配置迁移验证'),
             ('basic_monitoring_test.py', '基础监控功能测试'),
             ('performance_benchmark.py', '性能基准测试'),
         ]
-        
-        # 运行每个测试
-        for script_name, description in test_suite:
-            test_result = self.run_test_script(script_name, description)
-            self.results[script_name] = {
-                'description': description,
-                'result': test_result,
-                'timestamp': datetime.now().isoformat()
-            }
-        
+
+        if sequential:
+            # 顺序执行每个测试
+            for script_name, description in test_suite:
+                test_result = self.run_test_script(script_name, description)
+                self.results[script_name] = {
+                    'description': description,
+                    'result': test_result,
+                    'timestamp': datetime.now().isoformat()
+                }
+        else:
+            # 并行执行：每个脚本一个工作进程
+            with ProcessPoolExecutor(max_workers=len(test_suite)) as executor:
+                futures = {
+                    executor.submit(self.run_test_script, script_name, description): (script_name, description)
+                    for script_name, description in test_suite
+                }
+                for future in as_completed(futures):
+                    script_name, description = futures[future]
+                    self.results[script_name] = {
+                        'description': description,
+                        'result': future.result(),
+                        'timestamp': datetime.now().isoformat()
+                    }
+
         self.end_time = datetime.now()
-        
+
         # 生成综合报告
         self.generate_comprehensive_report()
     
@@ -121,13 +194,19 @@ class TestSuiteRunner:
         print("\n📊 生成综合测试报告...")
         print("=" * 80)
         
+        # 状态计数和总耗时在一次遍历里累计，不做五轮全量扫描
         total_tests = len(self.results)
-        passed_tests = len([r for r in self.results.values() if r['result']['status'] == 'passed'])
-        failed_tests = len([r for r in self.results.values() if r['result']['status'] == 'failed'])
-        error_tests = len([r for r in self.results.values() if r['result']['status'] == 'error'])
-        timeout_tests = len([r for r in self.results.values() if r['result']['status'] == 'timeout'])
-        
-        total_execution_time = sum(r['result']['execution_time'] for r in self.results.values())
+        status_counts = Counter()
+        total_execution_time = 0.0
+        for info in self.results.values():
+            result = info['result']
+            status_counts[result['status']] += 1
+            total_execution_time += result['execution_time']
+
+        passed_tests = status_counts['passed']
+        failed_tests = status_counts['failed']
+        error_tests = status_counts['error']
+        timeout_tests = status_counts['timeout']
         
         # 计算成功率
         success_rate = (passed_tests / total_tests * 100) if total_tests > 0 else 0
@@ -169,8 +248,13 @@ class TestSuiteRunner:
         logs_dir.mkdir(exist_ok=True)
         report_path = logs_dir / f"test_suite_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
         
-        with open(report_path, 'w', encoding='utf-8') as f:
-            json.dump(report, f, indent=2, ensure_ascii=False)
+        # 一次性序列化为bytes整体写入，orjson不可用时退回stdlib
+        if orjson is not None:
+            data = orjson.dumps(report, option=orjson.OPT_INDENT_2)
+        else:
+            data = json.dumps(report, indent=2, ensure_ascii=False).encode('utf-8')
+        with open(report_path, 'wb') as f:
+            f.write(data)
         
         # 显示摘要
         print(f"📋 测试摘要:")
@@ -191,13 +275,8 @@ class TestSuiteRunner:
             status = test_info['result']['status']
             execution_time = test_info['result']['execution_time']
             
-            status_icon = {
-                'passed': '✅',
-                'failed': '❌',
-                'error': '💥',
-                'timeout': '⏰'
-            }.get(status, '❓')
-            
+            status_icon = _STATUS_ICON.get(status, '❓')
+
             print(f"  {status_icon} {test_info['description']}: {status} ({execution_time:.2f}s)")
             
             if status != 'passed' and 'error' in test_info['result']:
@@ -275,16 +354,17 @@ def main():
     parser = argparse.ArgumentParser(description='Discord机器人测试套件运行器')
     parser.add_argument('--test', '-t', help='运行特定测试 (config, monitoring, performance, cache)')
     parser.add_argument('--all', '-a', action='store_true', help='运行所有测试')
-    
+    parser.add_argument('--sequential', action='store_true', help='顺序执行测试(默认并行)')
+
     args = parser.parse_args()
-    
+
     runner = TestSuiteRunner()
-    
+
     if args.test:
         success = runner.run_specific_test(args.test)
         sys.exit(0 if success else 1)
     elif args.all or len(sys.argv) == 1:
-        runner.run_all_tests()
+        runner.run_all_tests(sequential=args.sequential)
         
         # 检查是否所有测试都通过
         all_passed = all(info['result']['status'] == 'passed' 
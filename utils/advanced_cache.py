@@ -1,10 +1,29 @@
 import redis.asyncio as redis
 import pickle
+import json
 import logging
 import asyncio
+import heapq
 from typing import Dict, Any, Optional, List
 from datetime import datetime, timedelta
 import time
+from collections import defaultdict, OrderedDict
+
+try:
+    import orjson  # JSON可表示的载荷走orjson，比pickle编解码快且字节更小
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack  # 小dict/list载荷的打包二进制编码，比JSON更小更快
+except ImportError:
+    msgpack = None
+
+# Redis值的单字节版本前缀：b'M'=msgpack编码，b'O'=JSON编码，b'P'=pickle编码。
+# 读取时按前缀分支，旧的无前缀pickle条目可透明迁移。
+_FMT_MSGPACK = b'M'
+_FMT_JSON = b'O'
+_FMT_PICKLE = b'P'
 
 class AdvancedCache:
     """高级缓存系统，支持内存缓存和Redis，针对大型服务器优化
@@ -25,23 +44,36 @@ class AdvancedCache:
             ttl: 缓存项生存时间(秒)
             max_items: 内存缓存最大项数
         """
-        self._memory_cache = {}
+        # OrderedDict按访问新旧排序当LRU用：命中/写入move_to_end，
+        # 淘汰时从队头popitem，不再对全部条目做O(N log N)排序。
+        # 条目是(data, expire_at)元组，省掉每项一个dict的开销；
+        # expire_at基于time.monotonic()，读路径一次比较即判过期
+        self._memory_cache = OrderedDict()
+        # 前缀桶索引：键的首段('thread'、'forum'等) → 该桶全部键。
+        # 按模式失效时只扫对应桶，不再全量遍历内存缓存
+        self._prefix_index = defaultdict(set)
+        # (expire_at, key)最小堆：清理只弹已到期的堆顶，代价随实际过期量走，
+        # 不再整表扫描。键被覆盖/删除后留下的旧堆项在弹出时按expire_at比对跳过
+        self._expiry_heap = []
         self._use_redis = use_redis
         self._redis_url = redis_url or "redis://localhost:6379/0"
         self._ttl = ttl
+        self._ttl_float = float(ttl)
         self._max_items = max_items
         self._logger = logging.getLogger('discord_bot.cache')
         self._lock = asyncio.Lock()
-        self._stats = {
-            'memory_hits': 0,
-            'redis_hits': 0,
-            'misses': 0,
-            'sets': 0,
-            'invalidations': 0,
-            'cleanups': 0,
-            'items_cleaned': 0,
-            'last_cleanup': time.time()
-        }
+        # 统计计数器是各自独立的int属性。注意+=并非原子——它编译成
+        # 读/加/写三条字节码，跨线程会丢更新；这里不进锁成立的唯一前提
+        # 是所有增减都发生在事件循环这一个线程上。不要从run_in_executor
+        # 等其他线程里改这些计数器
+        self._memory_hits = 0
+        self._redis_hits = 0
+        self._misses = 0
+        self._sets = 0
+        self._invalidations = 0
+        self._cleanups = 0
+        self._items_cleaned = 0
+        self._last_cleanup = time.time()
         self._redis = None
         self._redis_available = False
         self._redis_last_check = 0
@@ -50,6 +82,58 @@ class AdvancedCache:
         # Redis连接现在需要异步初始化，所以这里不直接连接
         # 将在第一次使用或显式调用connect时连接
     
+    @staticmethod
+    def _bucket_of(key: str) -> str:
+        """键所属的索引桶：首个'_'之前的段"""
+        return key.split('_', 1)[0]
+
+    def _index_add(self, key: str) -> None:
+        """把键登记进前缀桶索引"""
+        self._prefix_index[self._bucket_of(key)].add(key)
+
+    def _index_discard(self, key: str) -> None:
+        """把键从前缀桶索引移除，空桶随手删掉"""
+        bucket_name = self._bucket_of(key)
+        bucket = self._prefix_index.get(bucket_name)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._prefix_index[bucket_name]
+
+    @staticmethod
+    def _serialize(data: Any) -> bytes:
+        """序列化为带格式前缀的bytes
+
+        常见载荷(线程统计dict、消息list)优先走msgpack——
+        比JSON字节更小、编解码更快；没有msgpack时退回JSON，
+        两者都放不下的对象退回pickle，前缀标记编码方式。
+        不支持的类型抛TypeError，超出64位的整数msgpack抛
+        OverflowError(orjson则是ValueError)，一律退回pickle——
+        set()不能因载荷形状而失败。
+        """
+        try:
+            if msgpack is not None:
+                return _FMT_MSGPACK + msgpack.packb(data, use_bin_type=True)
+            if orjson is not None:
+                return _FMT_JSON + orjson.dumps(data)
+            return _FMT_JSON + json.dumps(data, ensure_ascii=False).encode('utf-8')
+        except (TypeError, OverflowError, ValueError):
+            return _FMT_PICKLE + pickle.dumps(data)
+
+    @staticmethod
+    def _deserialize(raw: bytes) -> Any:
+        """按格式前缀反序列化；无前缀的历史条目按pickle处理"""
+        prefix = raw[:1]
+        if prefix == _FMT_MSGPACK:
+            return msgpack.unpackb(raw[1:], raw=False, strict_map_key=False)
+        if prefix == _FMT_JSON:
+            if orjson is not None:
+                return orjson.loads(raw[1:])
+            return json.loads(raw[1:])
+        if prefix == _FMT_PICKLE:
+            return pickle.loads(raw[1:])
+        return pickle.loads(raw)
+
     async def connect(self):
         """异步初始化Redis连接"""
         if self._use_redis:
@@ -61,8 +145,17 @@ class AdvancedCache:
             return False
             
         try:
-            # redis.asyncio.from_url 返回一个客户端实例，不需要await
-            self._redis = redis.from_url(redis_url or self._redis_url)
+            # 显式连接池：上限32个连接复用，TCP keepalive和周期健康检查
+            # 及时发现死连接，超时命令自动重试，平滑Redis操作的尾延迟
+            pool = redis.ConnectionPool.from_url(
+                redis_url or self._redis_url,
+                max_connections=32,
+                socket_keepalive=True,
+                health_check_interval=30,
+                retry_on_timeout=True,
+                decode_responses=False
+            )
+            self._redis = redis.Redis(connection_pool=pool)
             # 测试连接是否有效
             await self._redis.ping()
             self._redis_available = True
@@ -99,40 +192,50 @@ class AdvancedCache:
         Returns:
             缓存值或None(如果不存在)
         """
-        async with self._lock:
-            current_time = datetime.now().timestamp()
-            
-            # 尝试从内存缓存获取
-            if key in self._memory_cache:
-                item = self._memory_cache[key]
-                if current_time - item['timestamp'] < self._ttl:
-                    self._stats['memory_hits'] += 1
-                    self._logger.debug(f"内存缓存命中: {key}")
-                    return item['data']
-                else:
-                    # 过期数据清理
-                    del self._memory_cache[key]
-            
-            # 如果启用Redis且连接可用，从Redis获取
-            if self._use_redis and (self._redis_available or await self._check_redis_connection()):
+        # monotonic时钟比datetime.now()便宜得多，且不受系统时间回拨影响
+        current_time = time.monotonic()
+
+        # 无锁快路径：CPython下dict读取是原子操作，
+        # 命中内存缓存的读彼此不串行
+        item = self._memory_cache.get(key)
+        if item is not None:
+            data, expire_at = item
+            if current_time < expire_at:
+                self._memory_hits += 1
                 try:
-                    data = await self._redis.get(key)
-                    if data:
-                        self._stats['redis_hits'] += 1
-                        self._logger.debug(f"Redis缓存命中: {key}")
-                        decoded_data = pickle.loads(data)
-                        # 同时更新内存缓存
-                        self._memory_cache[key] = {
-                            'data': decoded_data,
-                            'timestamp': current_time
-                        }
-                        return decoded_data
-                except Exception as e:
-                    self._redis_available = False
-                    self._logger.error(f"Redis读取错误，切换到内存缓存: {e}")
-            
-            self._stats['misses'] += 1
-            return None
+                    self._memory_cache.move_to_end(key)
+                except KeyError:
+                    pass  # 并发淘汰把键移走了，不影响本次命中
+                self._logger.debug(f"内存缓存命中: {key}")
+                return data
+            # 过期剔除：pop+索引同步之间没有await，事件循环单线程下
+            # 这段对其他协程就是原子的，读路径完全不碰锁
+            if self._memory_cache.pop(key, None) is not None:
+                self._index_discard(key)
+
+        # 如果启用Redis且连接可用，从Redis获取；
+        # await放在锁外，多个协程的Redis读可以真正并发
+        if self._use_redis and (self._redis_available or await self._check_redis_connection()):
+            try:
+                data = await self._redis.get(key)
+                if data:
+                    self._redis_hits += 1
+                    self._logger.debug(f"Redis缓存命中: {key}")
+                    decoded_data = self._deserialize(data)
+                    # 回填内存缓存：同样是无await的连续变更，不需要锁；
+                    # 持锁写方(set等)的变更序列也不会在中途让出
+                    expire_at = time.monotonic() + self._ttl_float
+                    self._memory_cache[key] = (decoded_data, expire_at)
+                    self._memory_cache.move_to_end(key)
+                    self._index_add(key)
+                    heapq.heappush(self._expiry_heap, (expire_at, key))
+                    return decoded_data
+            except Exception as e:
+                self._redis_available = False
+                self._logger.error(f"Redis读取错误，切换到内存缓存: {e}")
+
+        self._misses += 1
+        return None
     
     async def set(self, key: str, data: Any) -> None:
         """设置缓存项
@@ -142,29 +245,111 @@ class AdvancedCache:
             data: 要缓存的数据
         """
         async with self._lock:
-            current_time = datetime.now().timestamp()
-            
+            expire_at = time.monotonic() + self._ttl_float
+
             # 清理检查
             if len(self._memory_cache) >= self._max_items:
                 await self._cleanup_oldest()
-            
-            # 更新内存缓存
-            self._memory_cache[key] = {
-                'data': data,
-                'timestamp': current_time
-            }
-            
+
+            # 更新内存缓存(写入即最新，挪到LRU队尾)
+            self._memory_cache[key] = (data, expire_at)
+            self._memory_cache.move_to_end(key)
+            self._index_add(key)
+            heapq.heappush(self._expiry_heap, (expire_at, key))
+
             # 如果启用Redis且连接可用，同时更新Redis
             if self._use_redis and (self._redis_available or await self._check_redis_connection()):
                 try:
-                    pickled_data = pickle.dumps(data)
-                    await self._redis.setex(key, self._ttl, pickled_data)
+                    await self._redis.setex(key, self._ttl, self._serialize(data))
                 except Exception as e:
                     self._redis_available = False
                     self._logger.error(f"Redis写入错误，仅使用内存缓存: {e}")
             
-            self._stats['sets'] += 1
+            self._sets += 1
     
+    async def get_many(self, keys: List[str]) -> Dict[str, Any]:
+        """批量获取缓存项，Redis未命中部分合并为一次MGET往返
+
+        Args:
+            keys: 缓存键名列表
+
+        Returns:
+            命中的键到值的字典(未命中的键不出现在结果里)
+        """
+        results = {}
+        misses = []
+
+        async with self._lock:
+            current_time = time.monotonic()
+
+            # 先过一遍内存缓存，记下未命中的键
+            for key in keys:
+                item = self._memory_cache.get(key)
+                if item is not None:
+                    data, expire_at = item
+                    if current_time < expire_at:
+                        self._memory_hits += 1
+                        self._memory_cache.move_to_end(key)
+                        results[key] = data
+                        continue
+                    del self._memory_cache[key]
+                    self._index_discard(key)
+                misses.append(key)
+
+            # 未命中部分一次MGET取回，逐个解码并回填内存缓存
+            if misses and self._use_redis and (self._redis_available or await self._check_redis_connection()):
+                try:
+                    values = await self._redis.mget(misses)
+                    expire_at = time.monotonic() + self._ttl_float
+                    for key, raw in zip(misses, values):
+                        if raw is None:
+                            self._misses += 1
+                            continue
+                        data = self._deserialize(raw)
+                        self._redis_hits += 1
+                        self._memory_cache[key] = (data, expire_at)
+                        self._memory_cache.move_to_end(key)
+                        self._index_add(key)
+                        heapq.heappush(self._expiry_heap, (expire_at, key))
+                        results[key] = data
+                except Exception as e:
+                    self._redis_available = False
+                    self._misses += len(misses)
+                    self._logger.error(f"Redis批量读取错误，切换到内存缓存: {e}")
+            else:
+                self._misses += len(misses)
+
+        return results
+
+    async def set_many(self, items: Dict[str, Any]) -> None:
+        """批量设置缓存项，Redis写入走pipeline合并为一次往返
+
+        Args:
+            items: 键到值的字典
+        """
+        async with self._lock:
+            expire_at = time.monotonic() + self._ttl_float
+
+            for key, data in items.items():
+                if len(self._memory_cache) >= self._max_items:
+                    await self._cleanup_oldest()
+                self._memory_cache[key] = (data, expire_at)
+                self._memory_cache.move_to_end(key)
+                self._index_add(key)
+                heapq.heappush(self._expiry_heap, (expire_at, key))
+
+            if self._use_redis and (self._redis_available or await self._check_redis_connection()):
+                try:
+                    async with self._redis.pipeline(transaction=False) as pipe:
+                        for key, data in items.items():
+                            pipe.setex(key, self._ttl, self._serialize(data))
+                        await pipe.execute()
+                except Exception as e:
+                    self._redis_available = False
+                    self._logger.error(f"Redis批量写入错误，仅使用内存缓存: {e}")
+
+            self._sets += len(items)
+
     async def invalidate(self, key: str) -> None:
         """使缓存项失效
         
@@ -174,7 +359,8 @@ class AdvancedCache:
         async with self._lock:
             if key in self._memory_cache:
                 del self._memory_cache[key]
-            
+                self._index_discard(key)
+
             # 如果启用Redis且连接可用，同时从Redis删除
             if self._use_redis and (self._redis_available or await self._check_redis_connection()):
                 try:
@@ -183,7 +369,7 @@ class AdvancedCache:
                     self._redis_available = False
                     self._logger.error(f"Redis删除错误: {e}")
             
-            self._stats['invalidations'] += 1
+            self._invalidations += 1
     
     async def invalidate_pattern(self, pattern: str) -> int:
         """使匹配模式的所有缓存项失效. 使用 SCAN 替代 KEYS 命令.
@@ -199,19 +385,22 @@ class AdvancedCache:
         redis_deleted_count = 0
         
         async with self._lock:
-            # Invalidate from memory cache
-            # Create a list of keys to delete to avoid issues with modifying dict during iteration
-            mem_keys_to_delete = [k for k in self._memory_cache.keys() if pattern in k]
+            # 内存侧只扫模式首段对应的前缀桶，匹配代价与命中数成正比，
+            # 不再在锁内对整个缓存做O(N)子串扫描
+            bucket = self._prefix_index.get(self._bucket_of(pattern), ())
+            mem_keys_to_delete = [k for k in bucket if pattern in k]
             for key in mem_keys_to_delete:
                 del self._memory_cache[key]
+                self._index_discard(key)
                 mem_deleted_count += 1
-            
+
             # Invalidate from Redis cache
             if self._use_redis and (self._redis_available or await self._check_redis_connection()):
                 try:
-                    # Using scan_iter (async iterator in redis-py asyncio)
+                    # 锚定前缀的MATCH让Redis服务端跳过不相关键，
+                    # 比两端通配的*pattern*便宜得多
                     keys_from_redis_to_delete = []
-                    async for key in self._redis.scan_iter(match=f"*{pattern}*"):
+                    async for key in self._redis.scan_iter(match=f"{pattern}*"):
                         keys_from_redis_to_delete.append(key)
                     
                     if keys_from_redis_to_delete:
@@ -226,7 +415,7 @@ class AdvancedCache:
             total_deleted_count = mem_deleted_count + redis_deleted_count
             
             if total_deleted_count > 0:
-                self._stats['invalidations'] += total_deleted_count
+                self._invalidations += total_deleted_count
             
             self._logger.info(
                 f"模式'{pattern}'缓存清理: {total_deleted_count}项 "
@@ -241,54 +430,58 @@ class AdvancedCache:
         Returns:
             清理的项数
         """
-        self._stats['cleanups'] += 1
-        self._stats['last_cleanup'] = time.time()
-        current_time = datetime.now().timestamp()
-        
-        # 清理内存缓存
+        self._cleanups += 1
+        self._last_cleanup = time.time()
+        current_time = time.monotonic()
+
+        # 只弹过期堆里已到期的堆顶，不再整表扫描；
+        # 被覆盖/删除的键留下的旧堆项按expire_at比对识别并丢弃
+        cleaned_count = 0
         async with self._lock:
-            expired_keys = [
-                k for k, v in self._memory_cache.items() 
-                if current_time - v['timestamp'] >= self._ttl
-            ]
-            
-            for key in expired_keys:
-                del self._memory_cache[key]
-            
-            cleaned_count = len(expired_keys)
-            self._stats['items_cleaned'] += cleaned_count
-            
+            heap = self._expiry_heap
+            while heap and heap[0][0] <= current_time:
+                expire_at, key = heapq.heappop(heap)
+                entry = self._memory_cache.get(key)
+                if entry is not None and entry[1] == expire_at:
+                    del self._memory_cache[key]
+                    self._index_discard(key)
+                    cleaned_count += 1
+
+            self._items_cleaned += cleaned_count
+
             self._logger.info(f"缓存清理: 移除了 {cleaned_count} 个过期项，当前缓存大小: {len(self._memory_cache)}")
             return cleaned_count
     
     async def _cleanup_oldest(self) -> None:
-        """清理最旧的缓存项"""
+        """清理最久未访问的缓存项"""
         # 计算要清理的数量(最老的20%)
         items_to_clear = max(int(self._max_items * 0.2), 1)
+
+        # OrderedDict队头就是最久未访问的条目，O(k)直接弹出
+        items_to_clear = min(items_to_clear, len(self._memory_cache))
+        for _ in range(items_to_clear):
+            old_key, _ = self._memory_cache.popitem(last=False)
+            self._index_discard(old_key)
         
-        # 按时间戳排序
-        sorted_items = sorted(
-            self._memory_cache.items(), 
-            key=lambda x: x[1]['timestamp']
-        )
-        
-        # 删除最老的项
-        for old_key, _ in sorted_items[:items_to_clear]:
-            del self._memory_cache[old_key]
-        
-        self._stats['items_cleaned'] += items_to_clear
+        self._items_cleaned += items_to_clear
         self._logger.info(f"缓存空间清理: 移除了 {items_to_clear} 项最老的缓存")
     
     async def start_background_cleanup(self, interval=60) -> None:
         """启动定期后台清理任务
         
         Args:
-            interval: 清理间隔(秒)
+            interval: 清理间隔上限(秒)；已知更早的过期点时会提前醒来
         """
         self._logger.info(f"启动缓存后台清理，间隔: {interval}秒")
-        
+
         while True:
-            await asyncio.sleep(interval)
+            # 睡到下一个已知过期点(至少1秒，至多interval)，
+            # 缓存全是热数据时不做无谓的唤醒扫描
+            if self._expiry_heap:
+                sleep_for = min(interval, max(1.0, self._expiry_heap[0][0] - time.monotonic()))
+            else:
+                sleep_for = interval
+            await asyncio.sleep(sleep_for)
             try:
                 cleaned = await self.cleanup()
                 self._logger.debug(f"自动缓存清理完成: {cleaned}项")
@@ -306,22 +499,22 @@ class AdvancedCache:
         Returns:
             包含各种统计数据的字典
         """
-        total_requests = self._stats['memory_hits'] + self._stats['redis_hits'] + self._stats['misses']
-        hit_rate = ((self._stats['memory_hits'] + self._stats['redis_hits']) / total_requests * 100) if total_requests > 0 else 0
+        total_requests = self._memory_hits + self._redis_hits + self._misses
+        hit_rate = ((self._memory_hits + self._redis_hits) / total_requests * 100) if total_requests > 0 else 0
         
         return {
             'memory_size': len(self._memory_cache),
             'memory_limit': self._max_items,
             'memory_usage_pct': (len(self._memory_cache) / self._max_items * 100) if self._max_items > 0 else 0,
             'hit_rate_pct': hit_rate,
-            'memory_hits': self._stats['memory_hits'],
-            'redis_hits': self._stats['redis_hits'],
-            'misses': self._stats['misses'],
-            'sets': self._stats['sets'],
-            'invalidations': self._stats['invalidations'],
-            'cleanups': self._stats['cleanups'],
-            'items_cleaned': self._stats['items_cleaned'],
-            'last_cleanup': datetime.fromtimestamp(self._stats['last_cleanup']).strftime('%Y-%m-%d %H:%M:%S'),
+            'memory_hits': self._memory_hits,
+            'redis_hits': self._redis_hits,
+            'misses': self._misses,
+            'sets': self._sets,
+            'invalidations': self._invalidations,
+            'cleanups': self._cleanups,
+            'items_cleaned': self._items_cleaned,
+            'last_cleanup': datetime.fromtimestamp(self._last_cleanup).strftime('%Y-%m-%d %H:%M:%S'),
             'use_redis': self._use_redis,
             'redis_available': self._redis_available,
             'ttl': self._ttl
@@ -355,8 +548,28 @@ class ThreadCache(AdvancedCache):
             stats: 线程统计数据
         """
         cache_key = f"thread_stats_{thread_id}"
+        # datetime字段先转isoformat，保证统计dict走JSON编码而非退回pickle
+        stats = {
+            k: (v.isoformat() if isinstance(v, datetime) else v)
+            for k, v in stats.items()
+        }
         await self.set(cache_key, stats)
     
+    async def mget_thread_stats(self, thread_ids: List[str]) -> Dict[str, Optional[Dict]]:
+        """批量获取多个线程的统计信息
+
+        N个线程ID合并为一次get_many调用(Redis侧单次MGET)，
+        避免逐线程串行往返。
+
+        Args:
+            thread_ids: Discord线程ID列表
+
+        Returns:
+            线程ID到统计信息的字典(未命中的为None)
+        """
+        cached = await self.get_many([f"thread_stats_{tid}" for tid in thread_ids])
+        return {tid: cached.get(f"thread_stats_{tid}") for tid in thread_ids}
+
     async def invalidate_thread(self, thread_id: str) -> None:
         """使线程相关缓存失效
         
@@ -1,10 +1,24 @@
+import functools
 import logging
+import re
 from typing import Optional, List, Tuple
 from discord import Message, Attachment
 
 logger = logging.getLogger('discord_bot.attachment')
 
-SUPPORTED_IMAGE_FORMATS = ['.jpg', '.jpeg', '.png', '.gif', '.webp']
+# 扩展名+content type合法性压成一条预编译正则：
+# 对"文件名:content_type"拼接串做单次C级匹配，
+# 取代lower/splitext/集合查找/前缀判断几步Python级字符串操作
+_VALID_ATT_RE = re.compile(r'(?i)\.(jpe?g|png|gif|webp):image/')
+
+@functools.lru_cache(maxsize=256)
+def _att_sig_ok(sig: str) -> bool:
+    """扩展名+content type组合的判定结果缓存
+
+    组合种类有限(几种扩展名×几种content type)，重复出现的附件类型
+    命中缓存后连正则匹配都省掉。判定规则不可变，缓存才安全。
+    """
+    return _VALID_ATT_RE.search(sig) is not None
 MAX_FILE_SIZE = 8 * 1024 * 1024  # 8MB
 
 class AttachmentProcessor:
@@ -21,33 +35,27 @@ class AttachmentProcessor:
         Returns:
             bool: 是否为有效的图片附件
         """
-        try:
-            if not attachment:
-                logger.warning("收到空的附件对象")
-                return False
-
-            # 检查文件大小
-            if attachment.size > MAX_FILE_SIZE:
-                logger.warning(f"附件太大: {attachment.filename} ({attachment.size} bytes)")
-                return False
-
-            # 检查文件扩展名
-            if not any(attachment.filename.lower().endswith(ext) for ext in SUPPORTED_IMAGE_FORMATS):
-                logger.info(f"不支持的文件格式: {attachment.filename}")
-                return False
-
-            # 检查content type
-            if not attachment.content_type or 'image' not in attachment.content_type.lower():
-                logger.info(f"非图片content type: {attachment.content_type}")
-                return False
+        # 检查顺序从便宜到贵：空值 → 大小(整数比较) → 正则一次判完扩展名和content type；
+        # 异常处理留给get_message_images的调用循环
+        if not attachment:
+            logger.warning("收到空的附件对象")
+            return False
 
-            logger.info(f"找到有效图片附件: {attachment.filename} ({attachment.content_type})")
-            return True
+        if attachment.size > MAX_FILE_SIZE:
+            logger.warning(f"附件太大: {attachment.filename} ({attachment.size} bytes)")
+            return False
 
-        except Exception as e:
-            logger.error(f"检查附件时出错: {str(e)}")
+        # info日志走%占位的惰性格式化，INFO未启用时不付字符串拼接成本
+        # 合法扩展名含点最长5个字符，取文件名尾部切片作缓存键——
+        # 正则要求扩展名紧贴分隔符，截断不会引入误判
+        content_type = attachment.content_type
+        if not _att_sig_ok(f"{attachment.filename[-5:]}:{content_type or ''}"):
+            logger.info("非图片附件: %s (%s)", attachment.filename, content_type)
             return False
 
+        logger.info("找到有效图片附件: %s (%s)", attachment.filename, content_type)
+        return True
+
     @classmethod
     def get_message_images(cls, message: Message) -> Tuple[Optional[str], List[str]]:
         """
@@ -59,25 +67,24 @@ class AttachmentProcessor:
         Returns:
             Tuple[Optional[str], List[str]]: (第一张图片URL, 所有图片URL列表)
         """
-        if not message or not message.attachments:
-            logger.info(f"消息 {message.id if message else 'None'} 中没有附件")
+        # 无附件是最常见情形，快速路径不打日志直接返回；
+        # attachments只取一次属性
+        attachments = message.attachments if message else None
+        if not attachments:
             return None, []
 
-        valid_images = []
-        first_image = None
-
         try:
-            for attachment in message.attachments:
-                if cls.is_valid_image(attachment):
-                    image_url = attachment.proxy_url or attachment.url
-                    if not first_image:
-                        first_image = image_url
-                    valid_images.append(image_url)
+            valid_images = [
+                attachment.proxy_url or attachment.url
+                for attachment in attachments
+                if cls.is_valid_image(attachment)
+            ]
+            first_image = valid_images[0] if valid_images else None
 
             if valid_images:
-                logger.info(f"在消息 {message.id} 中找到 {len(valid_images)} 个有效图片附件")
+                logger.info("在消息 %s 中找到 %d 个有效图片附件", message.id, len(valid_images))
             else:
-                logger.info(f"在消息 {message.id} 中没有找到有效的图片附件")
+                logger.info("在消息 %s 中没有找到有效的图片附件", message.id)
 
             return first_image, valid_images
 
@@ -99,7 +106,7 @@ class AttachmentProcessor:
         try:
             first_image, _ = cls.get_message_images(message)
             if first_image:
-                logger.info(f"获取到首张图片: {first_image}")
+                logger.info("获取到首张图片: %s", first_image)
             return first_image
         except Exception as e:
             logger.error(f"获取首张图片时出错: {str(e)}")
@@ -119,7 +126,7 @@ class AttachmentProcessor:
         try:
             _, all_images = cls.get_message_images(message)
             if all_images:
-                logger.info(f"获取到 {len(all_images)} 张图片")
+                logger.info("获取到 %d 张图片", len(all_images))
             return all_images
         except Exception as e:
             logger.error(f"获取所有图片时出错: {str(e)}")
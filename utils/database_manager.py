@@ -7,21 +7,103 @@ import aiosqlite
 import asyncio
 import logging
 from typing import Optional, Dict, Any, List, Tuple, Union
-from datetime import datetime
+from datetime import datetime, timedelta
 import threading
 from contextlib import asynccontextmanager
 from config.settings import settings
 
 logger = logging.getLogger('discord_bot.database')
 
+# 连接级调优PRAGMA：单次executescript一并下发，
+# 省掉逐条PRAGMA各一次跨线程往返。cache_size为负值时单位是KiB(-64000≈64MB)；
+# mmap让读路径绕过read()系统调用，temp_store避免临时表落盘
+_TUNING_PRAGMAS = """
+    PRAGMA journal_mode=WAL;
+    PRAGMA synchronous=NORMAL;
+    PRAGMA cache_size=-64000;
+    PRAGMA temp_store=MEMORY;
+    PRAGMA mmap_size=30000000000;
+    PRAGMA foreign_keys=ON;
+    PRAGMA journal_size_limit=6144000;
+"""
+
+async def _tune(conn) -> None:
+    """对新连接应用调优PRAGMA并设置行工厂"""
+    await conn.executescript(_TUNING_PRAGMAS)
+    # Row按列名映射访问，读接口直接dict(row)打包，
+    # 不再逐列tuple下标拼dict
+    conn.row_factory = aiosqlite.Row
+
+# 写合并：每次单行写+commit在WAL下也要刷一帧，
+# 高频采集时fsync主导耗时；写入先进队列，后台任务攒批后
+# 单事务executemany落盘，把fsync摊到一批行上
+_WRITE_BATCH_MAX = 500
+_WRITE_SQL = {
+    'thread_stats': """
+        INSERT OR REPLACE INTO thread_stats
+        (thread_id, guild_id, channel_id, reaction_count, reply_count, updated_at)
+        VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
+    """,
+    'search_history': """
+        INSERT INTO search_history
+        (user_id, guild_id, query, results_count, search_time)
+        VALUES (?, ?, ?, ?, ?)
+    """,
+    'performance_metrics': """
+        INSERT INTO performance_metrics
+        (metric_type, metric_value, guild_id)
+        VALUES (?, ?, ?)
+    """,
+}
+
+# 读SQL同样固定为模块常量：每次调用文本完全一致，
+# 命中aiosqlite/SQLite的语句缓存，免去重复prepare
+_SQL_GET_THREAD_STATS = """
+    SELECT reaction_count, reply_count, updated_at
+    FROM thread_stats
+    WHERE thread_id = ?
+"""
+_SQL_GET_GUILD_THREAD_STATS = """
+    SELECT thread_id, channel_id, reaction_count, reply_count, updated_at
+    FROM thread_stats
+    WHERE guild_id = ?
+    ORDER BY updated_at DESC
+    LIMIT ?
+"""
+_SQL_GET_USER_SEARCH_HISTORY = """
+    SELECT query, results_count, search_time, created_at
+    FROM search_history
+    WHERE user_id = ?
+    ORDER BY created_at DESC
+    LIMIT ?
+"""
+_SQL_GET_PERFORMANCE_METRICS = """
+    SELECT metric_value, recorded_at
+    FROM performance_metrics
+    WHERE metric_type = ?
+    AND recorded_at > ?
+    ORDER BY recorded_at DESC
+"""
+_SQL_DELETE_OLD_SEARCH_HISTORY = "DELETE FROM search_history WHERE created_at < ?"
+_SQL_DELETE_OLD_METRICS = "DELETE FROM performance_metrics WHERE recorded_at < ?"
+
+def _utc_cutoff(**delta) -> str:
+    """当前UTC时间回退指定时长的截止串，与CURRENT_TIMESTAMP落库格式一致"""
+    return (datetime.utcnow() - timedelta(**delta)).strftime('%Y-%m-%d %H:%M:%S')
+
 class DatabaseManager:
     """数据库管理器，提供连接池和查询优化"""
     
     def __init__(self, db_path: str, pool_size: int = 5) -> None:
         self.db_path: str = db_path
         self.pool_size: int = pool_size
-        self._pool: List[aiosqlite.Connection] = []
-        self._pool_lock: asyncio.Lock = asyncio.Lock()
+        # LIFO队列自带等待/唤醒语义：取连接await get()，还连接put_nowait()，
+        # 不再为进出池各抢一次asyncio.Lock；LIFO优先复用刚用过的连接(缓存更热)
+        self._pool: asyncio.LifoQueue = asyncio.LifoQueue(maxsize=pool_size)
+        self._write_queues: Dict[str, asyncio.Queue] = {
+            table: asyncio.Queue() for table in _WRITE_SQL
+        }
+        self._writer_tasks: List[asyncio.Task] = []
         self._initialized: bool = False
         self._logger: logging.Logger = logger
         
@@ -34,31 +116,50 @@ class DatabaseManager:
             # 创建连接池
             for _ in range(self.pool_size):
                 conn = await aiosqlite.connect(self.db_path)
-                # 启用WAL模式以提高并发性能
-                await conn.execute("PRAGMA journal_mode=WAL")
-                # 设置同步模式为NORMAL以平衡性能和安全性
-                await conn.execute("PRAGMA synchronous=NORMAL")
-                # 增加缓存大小
-                await conn.execute("PRAGMA cache_size=10000")
-                # 启用外键约束
-                await conn.execute("PRAGMA foreign_keys=ON")
-                self._pool.append(conn)
-            
+                await _tune(conn)
+                self._pool.put_nowait(conn)
+
+            # 先置位再建表：_create_tables经get_connection取连接，
+            # 不能再触发一轮initialize
+            self._initialized = True
+
             # 创建表结构
             await self._create_tables()
-            
-            self._initialized = True
+
+            # 启动各表的写合并任务
+            self._writer_tasks = [
+                asyncio.create_task(self._writer_loop(table)) for table in _WRITE_SQL
+            ]
+
             self._logger.info(f"数据库连接池初始化完成，连接数: {self.pool_size}")
-            
+
         except Exception as e:
+            self._initialized = False
+            # 失败后必须清空已入池的连接：LifoQueue有界，留着它们
+            # 下次initialize的put_nowait会直接QueueFull，且每次重试
+            # 都泄漏一批新连接
+            while True:
+                try:
+                    conn = self._pool.get_nowait()
+                except asyncio.QueueEmpty:
+                    break
+                try:
+                    await conn.close()
+                except Exception:
+                    pass
             self._logger.error(f"数据库初始化失败: {e}")
             raise
     
     async def _create_tables(self) -> None:
-        """创建数据库表结构"""
+        """创建数据库表结构
+
+        SQLite不支持CREATE TABLE里内联的INDEX子句(那是MySQL语法)，
+        索引单独用CREATE INDEX IF NOT EXISTS建；全部DDL合并成一个脚本、
+        一笔事务提交，避免逐条语句各自fsync。
+        """
         async with self.get_connection() as conn:
-            # 线程统计表
-            await conn.execute("""
+            await conn.executescript("""
+                BEGIN;
                 CREATE TABLE IF NOT EXISTS thread_stats (
                     thread_id INTEGER PRIMARY KEY,
                     guild_id INTEGER NOT NULL,
@@ -66,15 +167,12 @@ class DatabaseManager:
                     reaction_count INTEGER DEFAULT 0,
                     reply_count INTEGER DEFAULT 0,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_guild_id (guild_id),
-                    INDEX idx_channel_id (channel_id),
-                    INDEX idx_updated_at (updated_at)
-                )
-            """)
-            
-            # 搜索历史表
-            await conn.execute("""
+                    updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_thread_stats_guild_id ON thread_stats(guild_id);
+                CREATE INDEX IF NOT EXISTS idx_thread_stats_channel_id ON thread_stats(channel_id);
+                CREATE INDEX IF NOT EXISTS idx_thread_stats_updated_at ON thread_stats(updated_at);
+
                 CREATE TABLE IF NOT EXISTS search_history (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     user_id INTEGER NOT NULL,
@@ -82,187 +180,163 @@ class DatabaseManager:
                     query TEXT NOT NULL,
                     results_count INTEGER DEFAULT 0,
                     search_time REAL DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_user_id (user_id),
-                    INDEX idx_guild_id (guild_id),
-                    INDEX idx_created_at (created_at)
-                )
-            """)
-            
-            # 性能指标表
-            await conn.execute("""
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_search_history_user_id ON search_history(user_id);
+                CREATE INDEX IF NOT EXISTS idx_search_history_guild_id ON search_history(guild_id);
+                CREATE INDEX IF NOT EXISTS idx_search_history_created_at ON search_history(created_at);
+
                 CREATE TABLE IF NOT EXISTS performance_metrics (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     metric_type TEXT NOT NULL,
                     metric_value REAL NOT NULL,
                     guild_id INTEGER,
-                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    INDEX idx_metric_type (metric_type),
-                    INDEX idx_guild_id (guild_id),
-                    INDEX idx_recorded_at (recorded_at)
-                )
+                    recorded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                );
+                CREATE INDEX IF NOT EXISTS idx_performance_metrics_metric_type ON performance_metrics(metric_type);
+                CREATE INDEX IF NOT EXISTS idx_performance_metrics_guild_id ON performance_metrics(guild_id);
+                CREATE INDEX IF NOT EXISTS idx_performance_metrics_recorded_at ON performance_metrics(recorded_at);
+                COMMIT;
             """)
-            
-            await conn.commit()
     
     @asynccontextmanager
     async def get_connection(self):
         """获取数据库连接的上下文管理器"""
         if not self._initialized:
             await self.initialize()
-            
-        async with self._pool_lock:
-            if not self._pool:
-                # 如果池为空，创建新连接
-                conn = await aiosqlite.connect(self.db_path)
-                await conn.execute("PRAGMA journal_mode=WAL")
-                await conn.execute("PRAGMA synchronous=NORMAL")
-                await conn.execute("PRAGMA cache_size=10000")
-                await conn.execute("PRAGMA foreign_keys=ON")
-            else:
-                conn = self._pool.pop()
-        
+
+        # 池空时get()挂起等待归还，队列有界所以不需要临时建连接的分支
+        conn = await self._pool.get()
         try:
             yield conn
         finally:
-            async with self._pool_lock:
-                if len(self._pool) < self.pool_size:
-                    self._pool.append(conn)
-                else:
-                    await conn.close()
+            self._pool.put_nowait(conn)
     
-    async def upsert_thread_stats(self, thread_id: int, guild_id: int, 
-                                 channel_id: int, reaction_count: int, 
+    async def _writer_loop(self, table: str) -> None:
+        """单表的写合并任务：阻塞等第一行，随手带走已排队的行，整批单事务写入"""
+        queue = self._write_queues[table]
+        sql = _WRITE_SQL[table]
+
+        while True:
+            rows = [await queue.get()]
+            while len(rows) < _WRITE_BATCH_MAX:
+                try:
+                    rows.append(queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
+
+            try:
+                async with self.get_connection() as conn:
+                    await conn.execute("BEGIN IMMEDIATE")
+                    try:
+                        await conn.executemany(sql, rows)
+                        await conn.commit()
+                    except BaseException:
+                        # 显式BEGIN后必须回滚再还连接，否则连接带着
+                        # 未结事务回池，后续使用者全部报
+                        # "cannot start a transaction within a transaction"
+                        await conn.rollback()
+                        raise
+            except Exception as e:
+                self._logger.error(f"{table} 批量写入失败: {e}")
+            finally:
+                for _ in rows:
+                    queue.task_done()
+
+    async def flush_writes(self) -> None:
+        """等待所有排队的写入落盘"""
+        for queue in self._write_queues.values():
+            await queue.join()
+
+    async def upsert_thread_stats(self, thread_id: int, guild_id: int,
+                                 channel_id: int, reaction_count: int,
                                  reply_count: int) -> None:
-        """插入或更新线程统计信息"""
-        async with self.get_connection() as conn:
-            await conn.execute("""
-                INSERT OR REPLACE INTO thread_stats 
-                (thread_id, guild_id, channel_id, reaction_count, reply_count, updated_at)
-                VALUES (?, ?, ?, ?, ?, CURRENT_TIMESTAMP)
-            """, (thread_id, guild_id, channel_id, reaction_count, reply_count))
-            await conn.commit()
+        """插入或更新线程统计信息(入队，由写合并任务批量落盘)"""
+        await self._write_queues['thread_stats'].put(
+            (thread_id, guild_id, channel_id, reaction_count, reply_count)
+        )
     
     async def get_thread_stats(self, thread_id: int) -> Optional[Dict[str, Any]]:
         """获取线程统计信息"""
         async with self.get_connection() as conn:
-            async with conn.execute("""
-                SELECT reaction_count, reply_count, updated_at
-                FROM thread_stats 
-                WHERE thread_id = ?
-            """, (thread_id,)) as cursor:
+            async with conn.execute(_SQL_GET_THREAD_STATS, (thread_id,)) as cursor:
                 row = await cursor.fetchone()
-                if row:
-                    return {
-                        'reaction_count': row[0],
-                        'reply_count': row[1],
-                        'updated_at': row[2]
-                    }
-                return None
+                return dict(row) if row else None
     
     async def get_guild_thread_stats(self, guild_id: int, limit: int = 100) -> List[Dict[str, Any]]:
         """获取服务器的线程统计信息"""
         async with self.get_connection() as conn:
-            async with conn.execute("""
-                SELECT thread_id, channel_id, reaction_count, reply_count, updated_at
-                FROM thread_stats 
-                WHERE guild_id = ?
-                ORDER BY updated_at DESC
-                LIMIT ?
-            """, (guild_id, limit)) as cursor:
+            async with conn.execute(_SQL_GET_GUILD_THREAD_STATS, (guild_id, limit)) as cursor:
                 rows = await cursor.fetchall()
-                return [
-                    {
-                        'thread_id': row[0],
-                        'channel_id': row[1],
-                        'reaction_count': row[2],
-                        'reply_count': row[3],
-                        'updated_at': row[4]
-                    }
-                    for row in rows
-                ]
+                return [dict(row) for row in rows]
     
     async def record_search_history(self, user_id: int, guild_id: int, 
                                    query: str, results_count: int, 
                                    search_time: float) -> None:
-        """记录搜索历史"""
-        async with self.get_connection() as conn:
-            await conn.execute("""
-                INSERT INTO search_history 
-                (user_id, guild_id, query, results_count, search_time)
-                VALUES (?, ?, ?, ?, ?)
-            """, (user_id, guild_id, query, results_count, search_time))
-            await conn.commit()
+        """记录搜索历史(入队，由写合并任务批量落盘)"""
+        await self._write_queues['search_history'].put(
+            (user_id, guild_id, query, results_count, search_time)
+        )
     
     async def get_user_search_history(self, user_id: int, limit: int = 10) -> List[Dict[str, Any]]:
         """获取用户搜索历史"""
         async with self.get_connection() as conn:
-            async with conn.execute("""
-                SELECT query, results_count, search_time, created_at
-                FROM search_history 
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            """, (user_id, limit)) as cursor:
+            async with conn.execute(_SQL_GET_USER_SEARCH_HISTORY, (user_id, limit)) as cursor:
                 rows = await cursor.fetchall()
-                return [
-                    {
-                        'query': row[0],
-                        'results_count': row[1],
-                        'search_time': row[2],
-                        'created_at': row[3]
-                    }
-                    for row in rows
-                ]
+                return [dict(row) for row in rows]
     
     async def record_performance_metric(self, metric_type: str, metric_value: float, 
                                        guild_id: Optional[int] = None) -> None:
-        """记录性能指标"""
-        async with self.get_connection() as conn:
-            await conn.execute("""
-                INSERT INTO performance_metrics 
-                (metric_type, metric_value, guild_id)
-                VALUES (?, ?, ?)
-            """, (metric_type, metric_value, guild_id))
-            await conn.commit()
+        """记录性能指标(入队，由写合并任务批量落盘)"""
+        await self._write_queues['performance_metrics'].put(
+            (metric_type, metric_value, guild_id)
+        )
     
     async def get_performance_metrics(self, metric_type: str, 
                                      hours: int = 24) -> List[Tuple[float, str]]:
-        """获取性能指标"""
+        """获取性能指标
+
+        截止时间在Python侧算好后绑定参数——SQL文本不随hours变化，
+        语句缓存能命中，也杜绝了format拼接SQL
+        """
+        cutoff = _utc_cutoff(hours=hours)
         async with self.get_connection() as conn:
-            async with conn.execute("""
-                SELECT metric_value, recorded_at
-                FROM performance_metrics 
-                WHERE metric_type = ? 
-                AND recorded_at > datetime('now', '-{} hours')
-                ORDER BY recorded_at DESC
-            """.format(hours), (metric_type,)) as cursor:
+            async with conn.execute(_SQL_GET_PERFORMANCE_METRICS, (metric_type, cutoff)) as cursor:
                 return await cursor.fetchall()
     
     async def cleanup_old_data(self, days: int = 30) -> None:
         """清理旧数据"""
+        cutoff = _utc_cutoff(days=days)
         async with self.get_connection() as conn:
-            # 清理旧的搜索历史
-            await conn.execute("""
-                DELETE FROM search_history 
-                WHERE created_at < datetime('now', '-{} days')
-            """.format(days))
-            
-            # 清理旧的性能指标
-            await conn.execute("""
-                DELETE FROM performance_metrics 
-                WHERE recorded_at < datetime('now', '-{} days')
-            """.format(days))
-            
-            await conn.commit()
+            # 两张表的删除放进同一笔事务，共用一次提交；
+            # 失败必须回滚再还连接，带着未结事务回池会毒化后续使用者
+            await conn.execute("BEGIN IMMEDIATE")
+            try:
+                await conn.execute(_SQL_DELETE_OLD_SEARCH_HISTORY, (cutoff,))
+                await conn.execute(_SQL_DELETE_OLD_METRICS, (cutoff,))
+                await conn.commit()
+            except BaseException:
+                await conn.rollback()
+                raise
             self._logger.info(f"清理了{days}天前的旧数据")
     
     async def close(self) -> None:
         """关闭所有数据库连接"""
-        async with self._pool_lock:
-            for conn in self._pool:
-                await conn.close()
-            self._pool.clear()
+        # 先把排队的写入冲干净，再停掉写合并任务
+        await self.flush_writes()
+        for task in self._writer_tasks:
+            task.cancel()
+        self._writer_tasks.clear()
+
+        while True:
+            try:
+                conn = self._pool.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            # 长驻进程关闭前让SQLite按实际查询形态整理统计信息，
+            # 下次启动的查询计划更准
+            await conn.execute("PRAGMA optimize")
+            await conn.close()
         self._initialized = False
         self._logger.info("数据库连接池已关闭")
 
@@ -1,10 +1,13 @@
 """
 统一错误处理装饰器和异常管理
 """
+import itertools
 import logging
 import functools
+import sys
 import traceback
-from typing import Callable, Any, Optional, Dict, List, Tuple
+from collections import deque
+from typing import Callable, Any, Deque, Optional, Dict, Tuple
 import discord
 from discord.ext import commands
 from utils.embed_helper import DiscordEmbedBuilder
@@ -138,8 +141,10 @@ class ErrorReporter:
 
     def __init__(self) -> None:
         self.error_counts: Dict[str, int] = {}
-        self.last_errors: List[Dict[str, Any]] = []
         self.max_last_errors: int = 50
+        # maxlen由deque自己维护，新错误appendleft是O(1)，
+        # 不再有list.insert(0, ...)的整表搬移
+        self.last_errors: Deque[Dict[str, Any]] = deque(maxlen=self.max_last_errors)
 
     def report_error(self, error: Exception, context: str = "unknown") -> None:
         """报告错误"""
@@ -149,18 +154,17 @@ class ErrorReporter:
         # 更新错误计数
         self.error_counts[error_key] = self.error_counts.get(error_key, 0) + 1
 
-        # 记录最近的错误
+        # 记录最近的错误；没有活动异常时format_exc()只会返回
+        # "NoneType: None\n"还白白分配字符串，先用exc_info判断再取
         error_info = {
             'type': error_type,
             'message': str(error),
             'context': context,
-            'traceback': traceback.format_exc(),
+            'traceback': traceback.format_exc() if sys.exc_info()[0] is not None else '',
             'count': self.error_counts[error_key]
         }
 
-        self.last_errors.insert(0, error_info)
-        if len(self.last_errors) > self.max_last_errors:
-            self.last_errors.pop()
+        self.last_errors.appendleft(error_info)
 
         logger.error(f"Error reported - {context}: {error}", exc_info=True)
 
@@ -169,7 +173,7 @@ class ErrorReporter:
         return {
             'total_error_types': len(self.error_counts),
             'error_counts': dict(sorted(self.error_counts.items(), key=lambda x: x[1], reverse=True)),
-            'recent_errors': self.last_errors[:10]  # 最近10个错误
+            'recent_errors': list(itertools.islice(self.last_errors, 10))  # 最近10个错误
         }
 
 # 全局错误报告器实例
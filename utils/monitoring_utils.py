@@ -36,14 +36,19 @@ class SystemMonitor:
             'hostname': platform.node()
         }
 
-    def get_resource_usage(self) -> Dict[str, Any]:
-        """获取资源使用情况"""
+    def get_resource_usage(self, cpu_percent: Optional[float] = None) -> Dict[str, Any]:
+        """获取资源使用情况
+
+        ``cpu_percent`` 允许调用方传入已采样好的CPU占用率，
+        避免每个收集器各自付出一次 ``psutil.cpu_percent`` 的阻塞等待。
+        """
         if not PSUTIL_AVAILABLE:
             return self._get_basic_resource_usage()
 
         try:
             # CPU信息
-            cpu_percent = psutil.cpu_percent(interval=1)
+            if cpu_percent is None:
+                cpu_percent = psutil.cpu_percent(interval=1)
             cpu_count = psutil.cpu_count()
 
             # 内存信息
@@ -176,8 +181,16 @@ class SystemMonitor:
         except Exception as e:
             return {'error': str(e)}
 
-    def check_health_thresholds(self, thresholds: Optional[Dict[str, float]] = None) -> Dict[str, Any]:
-        """检查健康阈值"""
+    def check_health_thresholds(
+        self,
+        thresholds: Optional[Dict[str, float]] = None,
+        resource_usage: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """检查健康阈值
+
+        ``resource_usage`` 允许复用调用方已采集的资源快照，
+        避免同一次状态收集中重复的psutil扫描。
+        """
         if thresholds is None:
             thresholds = {
                 'cpu_percent': 70.0,
@@ -185,7 +198,8 @@ class SystemMonitor:
                 'disk_percent': 90.0
             }
 
-        resource_usage = self.get_resource_usage()
+        if resource_usage is None:
+            resource_usage = self.get_resource_usage()
         health_status = {
             'status': 'healthy',
             'alerts': [],
@@ -316,15 +330,27 @@ system_monitor = SystemMonitor()
 performance_collector = PerformanceCollector()
 alert_manager = AlertManager()
 
-def get_comprehensive_status() -> Dict[str, Any]:
-    """获取综合状态信息"""
+def get_comprehensive_status(batch: bool = False) -> Dict[str, Any]:
+    """获取综合状态信息
+
+    ``batch=True`` 时整次收集只做一次psutil采样扫描:
+    CPU占用率用一个短间隔(0.1秒)采样一次，资源快照在各子收集器间共享，
+    而不是每个收集器各自付出一次阻塞等待。
+    """
+    if batch:
+        cpu_percent = psutil.cpu_percent(interval=0.1) if PSUTIL_AVAILABLE else None
+        resource_usage = system_monitor.get_resource_usage(cpu_percent=cpu_percent)
+    else:
+        resource_usage = system_monitor.get_resource_usage()
+
     return {
         'timestamp': datetime.now().isoformat(),
         'uptime_seconds': time.time() - system_monitor.start_time,
         'system_info': system_monitor.get_system_info(),
-        'resource_usage': system_monitor.get_resource_usage(),
+        'resource_usage': resource_usage,
         'process_info': system_monitor.get_process_info(),
-        'health_check': system_monitor.check_health_thresholds(),
+        # 健康检查复用同一份资源快照，避免第二次psutil扫描
+        'health_check': system_monitor.check_health_thresholds(resource_usage=resource_usage),
         'alert_summary': alert_manager.get_alert_summary(),
         'performance_summary': {
             'metrics_count': len(performance_collector.metrics),